@@ -1,11 +1,25 @@
 import salabim as sim
-import random
 import sys
-import matplotlib.pyplot as plt
 import numpy as np
 import math
-
-sim.yieldless(False)
+import argparse
+import contextlib
+import csv
+import json
+import os
+import pickle
+import random
+import heapq
+from collections import deque
+from dataclasses import dataclass, field, asdict, replace
+from functools import partial
+from typing import Optional
+from timeseries import TimeSeriesRecorder
+from monitors import LevelHistogram, StreamingMonitor
+import results_export
+from layout import SWAP_NODE, build_layout, build_travel_tables
+from variates import VariateService
+from steady_state import converged, steady_state_summary
 
 class TextLoadingBar:
     def __init__(self, total_steps, description="Progress"):
@@ -33,31 +47,49 @@ class TextLoadingBar:
     def complete(self):
         print()  # New line when done
 
-# === SIMULATION ENVIRONMENT ===
-env = sim.Environment(trace=False, random_seed=42)
-
-# === CONFIGURATION FLAGS ===
+# === CONFIGURATION FLAGS (defaults for Scenario) ===
 USE_SWAPPING = True
 USE_SOC_WINDOW = True
 TEST_MODE = True
+USE_CONTAINER_RECORDS = True  # Plain records in a deque instead of a sim.Component per container
+USE_STREAMING_MONITORS = True  # Constant-memory statistics for the per-trip monitors
+FAST_FORWARD = True  # Suspend the periodic monitors while the terminal is idle between shipments
 
 # === ENV SETUP ===
 NUM_AGVS = 84
-NUM_BATTERIES = NUM_AGVS if not USE_SWAPPING else 154
+SWAPPING_BATTERY_POOL = 154  # Batteries in the pool when swapping; direct charging uses one per AGV
+NUM_BATTERIES = NUM_AGVS if not USE_SWAPPING else SWAPPING_BATTERY_POOL
 
 # === PARAMETERS ===
 CHARGING_RATE = 300  # kW
 BATTERY_CAPACITY = 191  # kWh
 AGV_SPEED = 20 * 1000 / 3600  # m/s (avg speed of 20 km/h)
-SWAPPING_TIME = 0 if not USE_SWAPPING else 180 # seconds	
+BATTERY_SWAP_DURATION = 180  # seconds
+SWAPPING_TIME = 0 if not USE_SWAPPING else BATTERY_SWAP_DURATION # seconds
 LOADING_TIME = 18 # seconds
 UNLOADING_TIME = 18 # seconds
 POWER_CONSUMPTION = 17 / 25  # kWh/kmh
 IDLE_POWER_CONSUMPTION = 9  # kWh
 SIM_TIME = 7 * 24 * 60 * 60 if TEST_MODE else 365 * 24 * 60 * 60 # 7 day or 30 days
-SOC_MIN = 20 if USE_SOC_WINDOW else 5
-SOC_MAX = 80 if USE_SOC_WINDOW else 100
-CRANE_CYCLE_TIME = random.normalvariate(120, 60)  # 60 to 180 seconds / max of 6 cranes per ship (time to load/unload a container) .normalvariate(mean,stddev)
+REPORT_PERCENTILES = (5, 50, 95)
+SAMPLE_INTERVAL = 3600  # seconds between time series samples, e.g. 60 for minute resolution
+STEADY_STATE_PRECISION = 0.05  # Stop a steady-state run when every CI half-width is within 5% of its mean
+STEADY_STATE_CHECK_INTERVAL = 7 * 24 * 60 * 60  # seconds of simulated time between convergence checks
+CHECKPOINT_INTERVAL = 30 * 24 * 60 * 60  # seconds of simulated time between checkpoints
+CHECKPOINT_VERSION = 3  # Bump when the model state changes shape; older checkpoints are then refused
+SOC_WINDOW = (20, 80)  # (SOC_MIN, SOC_MAX) when USE_SOC_WINDOW
+SOC_FULL_RANGE = (5, 100)  # (SOC_MIN, SOC_MAX) otherwise
+SOC_MIN, SOC_MAX = SOC_WINDOW if USE_SOC_WINDOW else SOC_FULL_RANGE
+NUM_CRANES = 6  # max of 6 cranes per ship, each unloads one container per cycle
+CRANE_CYCLE_MEAN = 120  # seconds, time for a crane to unload a container .normalvariate(mean,stddev)
+CRANE_CYCLE_STD = 60
+CRANE_CYCLE_MIN = 60  # Cycle times are clamped to 60 to 180 seconds
+CRANE_CYCLE_MAX = 180
+SHIPMENT_SIZE_SHAPE = 8  # Containers per shipment ~ gamma(8, 7065 / 8)
+SHIPMENT_SIZE_MEAN = 7065
+ARRIVAL_INTERVAL_SHAPE = 3  # Days between shipments ~ gamma(3, 1 / 3)
+DEADLINE_MEAN = 3000  # minutes, base deadline for a mean-sized shipment ~ normal(3000, 1400)
+DEADLINE_STD = 1400
 
 DEGRADATION_PROFILE = [
     ((0, 15), 0.15),    # 15% capacity loss at 1200 cycles
@@ -74,267 +106,545 @@ DEGRADATION_PROFILE = [
 SWAPPING_STATION = (0, 0)
 CONTAINER_PICKUP_X = 340
 CONTAINER_PICKUP_RANGE = range(290, 1491, 100)  # 290m to 1490m in 100m steps (12 points)
+YARD_X_RANGE = (300, 1300)  # Delivery area in the yard
+YARD_Y_RANGE = (250, 1000)
+YARD_SLOT_SPACING = 25  # meters between yard delivery slots in the travel tables
+ROAD_NETWORK = None  # Path to a road network JSON file (see road_network.py); None drives straight lines
+
+# === SCENARIO AND RESULTS ===
+@dataclass
+class Scenario:
+    """Configuration of one simulation run; defaults mirror the module constants"""
+    use_swapping: bool = USE_SWAPPING
+    use_soc_window: bool = USE_SOC_WINDOW
+    use_container_records: bool = USE_CONTAINER_RECORDS
+    use_streaming_monitors: bool = USE_STREAMING_MONITORS
+    fast_forward: bool = FAST_FORWARD
+    num_agvs: int = NUM_AGVS
+    num_batteries: Optional[int] = None  # None: one per AGV, or the swapping pool
+    charging_rate: float = CHARGING_RATE
+    battery_capacity: float = BATTERY_CAPACITY
+    agv_speed: float = AGV_SPEED
+    swapping_time: Optional[float] = None  # None: BATTERY_SWAP_DURATION when swapping, else 0
+    loading_time: float = LOADING_TIME
+    unloading_time: float = UNLOADING_TIME
+    power_consumption: float = POWER_CONSUMPTION
+    idle_power_consumption: float = IDLE_POWER_CONSUMPTION
+    yard_slot_spacing: float = YARD_SLOT_SPACING
+    road_network: Optional[str] = ROAD_NETWORK
+    sim_time: float = SIM_TIME
+    sample_interval: float = SAMPLE_INTERVAL
+    soc_min: Optional[float] = None  # None: taken from SOC_WINDOW or SOC_FULL_RANGE
+    soc_max: Optional[float] = None
+    num_cranes: int = NUM_CRANES
+    crane_cycle_mean: float = CRANE_CYCLE_MEAN
+    crane_cycle_std: float = CRANE_CYCLE_STD
+    crane_cycle_min: float = CRANE_CYCLE_MIN
+    crane_cycle_max: float = CRANE_CYCLE_MAX
+    degradation_profile: list = field(default_factory=lambda: list(DEGRADATION_PROFILE))
+    show_progress: bool = False
+
+    def derived_defaults(self):
+        """Values of the fields that default to None, as they follow from the flags and fleet size"""
+        soc_min, soc_max = SOC_WINDOW if self.use_soc_window else SOC_FULL_RANGE
+        return {
+            'num_batteries': self.num_agvs if not self.use_swapping else SWAPPING_BATTERY_POOL,
+            'swapping_time': 0 if not self.use_swapping else BATTERY_SWAP_DURATION,
+            'soc_min': soc_min,
+            'soc_max': soc_max
+        }
+
+    def __post_init__(self):
+        # Fill in the parameters that depend on the swapping / SOC window flags
+        for name, value in self.derived_defaults().items():
+            if getattr(self, name) is None:
+                setattr(self, name, value)
+
+@dataclass
+class Results:
+    """KPIs and raw records of one finished run, as plain picklable data"""
+    scenario: Scenario
+    seed: int
+    sim_time: float
+
+    # Monitor averages
+    avg_battery_soc: float
+    avg_battery_soh: float
+    avg_charging_time_min: float
+    avg_agv_idle_time_min: float
+    avg_agv_active_time_min: float
+    avg_container_delivery_time_min: float
+    avg_container_time_in_system_min: float
+    avg_battery_queue: float
+    avg_container_queue: float
+    avg_agv_queue: float
+
+    # Fleet averages
+    avg_charge_cycles: float
+    avg_usage_count: float
+    total_energy_delivered_kwh: float
+    avg_swaps_per_agv: float
+    avg_containers_per_agv: float
+    avg_distance_per_agv_km: float
+    soh_below_70_time: Optional[float]
+    monitor_percentiles: dict  # Monitor name -> {percentile: value} for the per-trip monitors
+    queue_stats: dict  # Queue name -> time-weighted mean, max and percentiles of its length
+
+    # Shipments
+    total_shipments: int
+    total_containers_received: int
+    shipment_sizes: list
+    completed_shipments: list
+    active_shipments: list
+
+    time_series: dict  # Series name -> NumPy array, 'time' in hours
+    agv_stats: list
+    battery_stats: list
+
+    # Start of the period the monitors, queue statistics and completed shipments cover:
+    # the warm-up end for run_until_steady, else 0. Time series and fleet state cover the whole run.
+    statistics_start: float = 0.0
+
+    def delivery_performance(self):
+        """On-time / overdue counts and average delay of the completed shipments
+
+        The percentages are NaN while no shipment has completed, so replication statistics
+        leave such runs out instead of counting them as 0% on time.
+        """
+        on_time = [s for s in self.completed_shipments if s['is_on_time']]
+        overdue = [s for s in self.completed_shipments if s['is_overdue']]
+        total_shipments = len(self.completed_shipments)
+        on_time_pct = (len(on_time) / total_shipments) * 100 if total_shipments > 0 else math.nan
+        avg_delay = (sum((s['completion_time'] - s['deadline_time']) / 60
+                    for s in overdue) / len(overdue)) if overdue else 0
+        return {
+            'on_time': len(on_time),
+            'overdue': len(overdue),
+            'on_time_pct': on_time_pct,
+            'overdue_pct': 100 - on_time_pct,
+            'avg_delay_min': avg_delay
+        }
+
+    def steady_state(self):
+        """Warm-up end and steady-state estimates from the time series (see steady_state.py)"""
+        return steady_state_summary(self.time_series, self.completed_shipments)
+
+    def kpis(self):
+        """Headline KPIs of the run as a flat dict, one row of a results table"""
+        delivery_times = [s['delivery_time'] / 3600 for s in self.completed_shipments]
+        return {
+            'on_time_pct': self.delivery_performance()['on_time_pct'],
+            'completed_shipments': len(self.completed_shipments),
+            'avg_shipment_delivery_time_h': (sum(delivery_times) / len(delivery_times)
+                                             if delivery_times else float('nan')),
+            'avg_container_delivery_time_min': self.avg_container_delivery_time_min,
+            'avg_container_time_in_system_min': self.avg_container_time_in_system_min,
+            'avg_battery_soc': self.avg_battery_soc,
+            'avg_battery_soh': self.avg_battery_soh,
+            'avg_battery_queue': self.avg_battery_queue,
+            'avg_container_queue': self.avg_container_queue,
+            'avg_agv_queue': self.avg_agv_queue
+        }
+
+# === CONTAINER RECORDS ===
+class ContainerRecord:
+    """Compact container token used instead of one sim.Component per container"""
+    __slots__ = ('created_at', 'shipment', 'pickup_point', 'delivery_point', 'processed_at')
+
+    def __init__(self, created_at, shipment):
+        self.created_at = created_at
+        self.shipment = shipment
+        self.pickup_point = None  # Layout node, set when an AGV picks the container up
+        self.delivery_point = None
+        self.processed_at = None  # Will be set when delivered
+
+class Buffer:
+    """Deque-backed FIFO offering the part of the sim.Queue API used for containers and batteries
+
+    Unlike sim.Queue it holds any object, not only components. Like the queues of
+    TerminalEnvironment.queue() it records its length in self.length.
+    """
+    __slots__ = ('name', 'length', '_items')
+
+    def __init__(self, name, env):
+        self.name = name
+        self.length = LevelHistogram(f"Length of {name}", env=env)
+        self._items = deque()
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        self._items.append(item)
+        self.length.tally(len(self._items))
+
+    def extend(self, items):
+        self._items.extend(items)
+        self.length.tally(len(self._items))
+
+    def pop(self):
+        item = self._items.popleft()
+        self.length.tally(len(self._items))
+        return item
+
+# === DEGRADATION ===
+class DegradationProfile:
+    """DEGRADATION_PROFILE compiled into NumPy arrays for constant-cost lookups
+
+    Ranges are sorted by lower SOC bound and may share boundaries but not overlap. Each
+    rate is the capacity fraction lost per 1200 cycles through that range.
+    """
+    def __init__(self, profile):
+        profile = sorted(profile)
+        self.lows = np.array([low for (low, high), _ in profile], dtype=float)
+        self.highs = np.array([high for (low, high), _ in profile], dtype=float)
+        if np.any(self.highs[:-1] > self.lows[1:]):
+            raise ValueError("Degradation profile ranges must not overlap")
+        self.labels = [f"{low}-{high}%" for (low, high), _ in profile]
+
+        # Cumulative capacity loss per cycle, so any run of ranges costs one subtraction
+        loss_per_cycle = np.array([rate for _, rate in profile], dtype=float) / 1200
+        self.cumulative_loss = np.concatenate(([0.0], np.cumsum(loss_per_cycle)))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def ranges_crossed(self, start_soc, end_soc):
+        """Index slice of the ranges touched by a charge from start_soc to end_soc"""
+        first = int(np.searchsorted(self.highs, start_soc, side='left'))  # First range with high >= start
+        stop = int(np.searchsorted(self.lows, end_soc, side='right'))  # Past the last range with low <= end
+        return first, max(first, stop)
+
+    def capacity_loss(self, first, stop):
+        """Fraction of initial capacity lost by one cycle through ranges first..stop-1"""
+        return self.cumulative_loss[stop] - self.cumulative_loss[first]
+
+# === BATTERY FLEET ===
+class BatteryFleet:
+    """Struct-of-arrays state of all batteries, indexed by battery id
+
+    Batteries are views that only hold their id and read and write these arrays, so
+    fleet-wide figures are single NumPy reductions.
+    """
+    def __init__(self, num_batteries, capacity, num_ranges):
+        self.size = num_batteries
+        self.initial_capacity = np.full(num_batteries, float(capacity))
+        self.capacity = self.initial_capacity.copy()
+        self.energy = self.capacity.copy()
+        self.soh = np.full(num_batteries, 100.0)  # State of Health (percentage of initial capacity)
+        self.charge_cycles = np.zeros(num_batteries, dtype=np.int64)
+        self.usage_count = np.zeros(num_batteries, dtype=np.int64)
+        self.total_energy_delivered = np.zeros(num_batteries)
+
+        # Cycles in each SOC range for degradation calculation, columns indexed like env.degradation
+        self.cycles_in_range = np.zeros((num_batteries, num_ranges), dtype=np.int64)
+
+    def extend(self, count, capacity):
+        """Add count new, fully charged batteries with ids following the existing ones"""
+        def grow(values, new_values):
+            return np.concatenate((values, np.full((count, *values.shape[1:]), new_values, dtype=values.dtype)))
+
+        self.size += count
+        self.initial_capacity = grow(self.initial_capacity, capacity)
+        self.capacity = grow(self.capacity, capacity)
+        self.energy = grow(self.energy, capacity)
+        self.soh = grow(self.soh, 100.0)
+        self.charge_cycles = grow(self.charge_cycles, 0)
+        self.usage_count = grow(self.usage_count, 0)
+        self.total_energy_delivered = grow(self.total_energy_delivered, 0.0)
+        self.cycles_in_range = grow(self.cycles_in_range, 0)
 
-loading_bar = TextLoadingBar(total_steps=SIM_TIME, description="Simulation Progress")
-
-# === MONITORS ===
-battery_soc_monitor = sim.Monitor("Battery SOC")
-battery_soh_monitor = sim.Monitor("Battery SOH")
-battery_usage_monitor = sim.Monitor("Battery Usage Count")
-battery_charge_cycles_monitor = sim.Monitor("Battery Charge Cycles")
-
-battery_queue_monitor = sim.Monitor("Battery Queue Length")
-container_queue_monitor = sim.Monitor("Container Queue Length")
-AGV_queue_monitor = sim.Monitor("AGV Queue Length")
-charging_time_monitor = sim.Monitor("Battery Charging Time")
-container_delivery_time_monitor = sim.Monitor("Container Delivery Time")
-agv_active_time_monitor = sim.Monitor("AGV Active Time")
-agv_idle_time_monitor = sim.Monitor("AGV Idle Time")
-
-swap_monitor = sim.Monitor("AGV Swaps")
-container_monitor = sim.Monitor("Containers Delivered")
-distance_monitor = sim.Monitor("Distance Traveled")
-travel_time_monitor = sim.Monitor("Travel Time")
-
-delivery_time_monitor = sim.Monitor("Shipment Handling Time")  # Time from first container to queue empty
-delivery_amount_monitor = sim.Monitor("Containers Per Shipment")
-shipment_size_monitor = sim.Monitor("Shipment Sizes")
-shipment_delivery_time_monitor = sim.Monitor("Shipment Delivery Times")
-shipment_unloading_time_monitor = sim.Monitor("Shipment Unloading Times")
-
-# === HOURLY QUEUE MONITORS ===
-hourly_queue_data = {
-    'time': [],
-    'battery_queue': [],
-    'container_queue': [],
-    'agv_queue': [],
-    'swapping_queue': [],
-    'charging_queue': []
-}
-
-# Shipment tracking data structure
-shipment_tracker = {
-    'active_shipments': [],  # List of active shipment dictionaries
-    'completed_shipments': [],  # List of completed shipments
-    'total_shipments': 0,
-    'last_queue_empty_time': 0,
-    'total_containers_received': 0
-}
-
-# === QUEUES ===
-BatteryQueue = sim.Queue("AvailableBatteries")
-ContainerQueue = sim.Queue("ContainerQueue")
-SwappingQueue = sim.Queue("SwappingQueue")
-ChargingQueue = sim.Queue("ChargingQueue")
-AGVQueue = sim.Queue("IdleAGVs")
-
-# === COMPONENT CLASSES ===
-class Battery(sim.Component):
-    def setup(self, soc=100):
-        self.initial_capacity = BATTERY_CAPACITY
-        self.capacity = self.initial_capacity
+    def soc(self):
+        return self.energy / self.capacity * 100
+
+    def mean_soc(self):
+        return float(self.soc().mean())
+
+    def mean_soh(self):
+        return float(self.soh.mean())
+
+class FleetField:
+    """Battery attribute stored in the matching BatteryFleet array"""
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, battery, owner=None):
+        if battery is None:
+            return self
+        return getattr(battery.fleet, self.name)[battery.battery_id]
+
+    def __set__(self, battery, value):
+        getattr(battery.fleet, self.name)[battery.battery_id] = value
+
+class Battery:
+    """View of one battery in the BatteryFleet arrays
+
+    A plain object rather than a component: the ChargingStation schedules its charges, so
+    fleets of thousands of batteries cost no salabim processes.
+    """
+    __slots__ = ('env', 'fleet', 'battery_id')
+
+    initial_capacity = FleetField()
+    capacity = FleetField()
+    energy = FleetField()
+    soh = FleetField()
+    charge_cycles = FleetField()
+    usage_count = FleetField()
+    total_energy_delivered = FleetField()
+    cycles_in_range = FleetField()  # Row view, so slice updates write through to the fleet
+
+    def __init__(self, env, battery_id, soc=100):
+        self.env = env
+        self.fleet = env.battery_fleet
+        self.battery_id = battery_id
         self.energy = soc / 100 * self.capacity
-        self.soh = 100  # State of Health (percentage of initial capacity)
-        self.charge_cycles = 0
-        self.usage_count = 0
-        self.total_energy_delivered = 0
-        self.soc_history = []  # Track SOC at each charge cycle
-        
-        # Track cycles in each SOC range for degradation calculation
-        self.cycles_in_range = {f"{low}-{high}%": 0 
-                              for (low, high), _ in DEGRADATION_PROFILE}
-    
+
+    def name(self):
+        return f"battery.{self.battery_id}"
+
     def soc(self):
-        return (self.energy / self.capacity) * 100
-    
+        fleet, i = self.fleet, self.battery_id
+        return float(fleet.energy[i] / fleet.capacity[i]) * 100
+
+    def discharge(self, energy_used, delivered=True):
+        """Draw energy_used kWh (never below empty) and return the new SOC"""
+        fleet, i = self.fleet, self.battery_id
+        energy = max(0.0, float(fleet.energy[i]) - energy_used)
+        fleet.energy[i] = energy
+        if delivered:
+            fleet.total_energy_delivered[i] += energy_used
+        return energy / float(fleet.capacity[i]) * 100
+
     def calculate_degradation(self, start_soc, end_soc):
         """Calculate degradation based on SOC range used during charging"""
+        degradation = self.env.degradation
+
         # Find which ranges this charge cycle passed through
-        ranges_used = []
-        for (low, high), _ in DEGRADATION_PROFILE:
-            if start_soc <= high and end_soc >= low:
-                ranges_used.append((low, high))
-        
-        # Apply degradation proportionally for each range
-        for (low, high) in ranges_used:
-            range_key = f"{low}-{high}%"
-            self.cycles_in_range[range_key] += 1
-            
-            # Find the degradation rate for this range
-            degradation_rate = next(d for (l,h), d in DEGRADATION_PROFILE 
-                                  if l == low and h == high)
-            
-            # Apply degradation (per cycle, scaled to 1200 cycles)
-            capacity_loss = (degradation_rate / 1200) * self.initial_capacity
-            self.capacity -= capacity_loss
-            self.capacity = max(self.capacity, 0.1 * self.initial_capacity)  # Never below 10%
-            
+        first, stop = degradation.ranges_crossed(start_soc, end_soc)
+        self.cycles_in_range[first:stop] += 1
+
+        # Apply the summed degradation of those ranges (per cycle, scaled to 1200 cycles)
+        self.capacity -= degradation.capacity_loss(first, stop) * self.initial_capacity
+        self.capacity = max(self.capacity, 0.1 * self.initial_capacity)  # Never below 10%
+
         # Update SOH
         self.soh = (self.capacity / self.initial_capacity) * 100
-        battery_soh_monitor.tally(self.soh)
-    
-    def process(self):
-        while True:
-            yield self.passivate()  # Wait in BatteryQueue
-            
-            # Store initial SOC before charging
-            start_soc = self.soc()
-            start_charge = self.env.now()  # Track when charging starts
-            
-            # Charging process
-            self.charge_cycles += 1
-            energy_needed = (SOC_MAX/100 * self.capacity) - self.energy
-            if energy_needed > 0:
-                charging_time = (energy_needed / CHARGING_RATE) * 3600
-                yield self.hold(charging_time)
-                self.energy = SOC_MAX/100 * self.capacity
-            
-            # Calculate degradation based on SOC range
-            self.calculate_degradation(start_soc, SOC_MAX)
-            
-            # Record statistics
-            charging_time_monitor.tally(self.env.now() - start_charge)
-            battery_soc_monitor.tally(self.soc())
-            battery_charge_cycles_monitor.tally(self.charge_cycles)
-            
-            BatteryQueue.add(self)
+        self.env.battery_soh_monitor.tally(self.soh)
+
+    def start_charge(self):
+        """Begin a charge to SOC_MAX; returns how long it takes, in seconds"""
+        scenario = self.env.scenario
+        self.charge_cycles += 1
+        energy_needed = (scenario.soc_max/100 * self.capacity) - self.energy
+        return (energy_needed / scenario.charging_rate) * 3600 if energy_needed > 0 else 0
+
+    def finish_charge(self, start_soc, charging_time):
+        """Complete the charge started with start_charge() and return the battery to BatteryQueue"""
+        env = self.env
+        scenario = env.scenario
+        if charging_time > 0:
+            self.energy = scenario.soc_max/100 * self.capacity
+
+        # Calculate degradation based on SOC range
+        self.calculate_degradation(start_soc, scenario.soc_max)
+
+        # Record statistics
+        env.charging_time_monitor.tally(charging_time)
+        env.battery_soc_monitor.tally(self.soc())
+        env.battery_charge_cycles_monitor.tally(self.charge_cycles)
+
+        env.BatteryQueue.add(self)
+        env.swapper_station.notify()
 
+# === COMPONENT CLASSES ===
 class AGV(sim.Component):
     def setup(self):
         self.battery = None
-        self.location = SWAPPING_STATION  # Start at swapping station
+        self.location = SWAP_NODE  # Start at swapping station
         self.distance_traveled = 0
         self.swap_count = 0
         self.containers_handled = 0
         self.waiting_for_battery = False  # Track if AGV is waiting for battery
         self.last_active_start = self.env.now()
+        self.wait_start = None  # When the AGV last joined AGVQueue
+
+        # Time tracking variables
+        self.idle_time = 0
+        self.running_time = 0
+        self.swapping_time = 0
+        self.last_state_change_time = self.env.now()
+        self.current_state = 'idle'  # Can be 'idle', 'running', 'swapping'
+
+    def change_state(self, new_state):
+        now = self.env.now()
+        time_in_state = now - self.last_state_change_time
+
+        # Record time spent in previous state
+        if self.current_state == 'idle':
+            self.idle_time += time_in_state
+        elif self.current_state == 'running':
+            self.running_time += time_in_state
+        elif self.current_state == 'swapping':
+            self.swapping_time += time_in_state
+
+        # Update to new state
+        self.current_state = new_state
+        self.last_state_change_time = now
 
-    def calculate_distance(self, from_loc, to_loc):
-        """Calculate Euclidean distance between two points"""
-        return ((to_loc[0]-from_loc[0])**2 + (to_loc[1]-from_loc[1])**2)**0.5
-    
     def travel_to(self, destination):
-        """Travel to destination and update statistics"""
-        distance = self.calculate_distance(self.location, destination)
-        travel_time = distance / AGV_SPEED
-        
+        """Travel to the destination layout node and update statistics"""
+        env = self.env
+        self.change_state('running')
+
+        # Leg costs come from the precomputed travel tables
+        travel = env.travel
+        leg = (self.location, destination)
+        distance = float(travel.distance[leg])
+        travel_time = float(travel.time[leg])
+
         self.distance_traveled += distance
-        energy_used = POWER_CONSUMPTION / 1000 * distance # kW/m * m = kWh 
-        self.battery.energy -= energy_used
-        self.battery.energy = max(0, self.battery.energy)
-        self.battery.total_energy_delivered += energy_used
-        battery_soc_monitor.tally(self.battery.soc())
+        env.battery_soc_monitor.tally(self.battery.discharge(float(travel.energy[leg])))
         self.location = destination
-        
+
         yield self.hold(travel_time)  # Simulate travel time
-        distance_monitor.tally(distance)
-        travel_time_monitor.tally(travel_time)
+        env.distance_monitor.tally(distance)
+        env.travel_time_monitor.tally(travel_time)
+
+        self.change_state('idle')
+
+    def wake_from_idle(self):
+        """Book the idle period that just ended when dispatch_idle_agvs activated this AGV"""
+        env = self.env
+        scenario = env.scenario
+
+        # Calculate idle energy usage while waiting
+        idle_duration = env.now() - self.wait_start
+        env.agv_idle_time_monitor.tally(idle_duration)
+        idle_energy_used = scenario.idle_power_consumption * (idle_duration / 3600) # in kWh
+        env.battery_soc_monitor.tally(self.battery.discharge(idle_energy_used, delivered=False))
+
+        # Hand the waiting work to another AGV if this one must swap first
+        if self.battery.soc() < scenario.soc_min and len(env.ContainerQueue) > 0:
+            env.dispatch_idle_agvs(1)
+        self.last_active_start = env.now()
+
+    def resumed_process(self):
+        """Continue after a checkpoint restore, where every AGV waits in AGVQueue"""
+        self.wake_from_idle()
+        yield from self.process()
 
     def process(self):
+        env = self.env
+        scenario = env.scenario
         while True:
             # Battery swap only if needed
-            if self.battery is None or self.battery.soc() < SOC_MIN:
+            if self.battery is None or self.battery.soc() < scenario.soc_min:
+                self.change_state('swapping')
+
                 if self.battery is not None:
                     # Travel to swapping station if not already there
-                    if self.location != SWAPPING_STATION:
-                        yield from self.travel_to(SWAPPING_STATION)
+                    if self.location != SWAP_NODE:
+                        yield from self.travel_to(SWAP_NODE)
                     # Send old battery to charging
-                    ChargingQueue.add(self.battery)
+                    env.ChargingQueue.add(self.battery)
+                    env.charging_station.notify()
                     self.battery = None
-                    self.swap_count += 1 if USE_SWAPPING else 0
+                    self.swap_count += 1 if scenario.use_swapping else 0
 
                 # Wait for a new battery
                 self.waiting_for_battery = True
-                SwappingQueue.add(self)
+                env.SwappingQueue.add(self)
+                env.swapper_station.notify()
                 yield self.passivate()
-                
+
                 # Get a battery (this should be guaranteed by SwapperStation)
-                if len(BatteryQueue) > 0:
-                    self.battery = BatteryQueue.pop()
+                if len(env.BatteryQueue) > 0:
+                    self.battery = env.BatteryQueue.pop()
                     self.battery.usage_count += 1
-                    yield self.hold(SWAPPING_TIME)
+                    yield self.hold(scenario.swapping_time)
                     self.waiting_for_battery = False
                 else:
                     # This shouldn't happen with proper SwapperStation logic
                     continue
 
             # Now we have a good battery, look for containers
-            if len(ContainerQueue) == 0:
+            if len(env.ContainerQueue) == 0:
                 # No containers available, wait
-                active_duration = self.env.now() - self.last_active_start
-                agv_active_time_monitor.tally(active_duration)
-                wait_start = self.env.now()
-                AGVQueue.add(self)
+                self.change_state('idle')
+                active_duration = env.now() - self.last_active_start
+                env.agv_active_time_monitor.tally(active_duration)
+                self.wait_start = env.now()
+                env.AGVQueue.add(self)
                 yield self.passivate()
+                self.wake_from_idle()
 
-                # Calculate idle energy usage while waiting
-                idle_duration = self.env.now() - wait_start
-                agv_idle_time_monitor.tally(idle_duration)
-                idle_energy_used = IDLE_POWER_CONSUMPTION * (idle_duration / 3600) # in kWh 
-                self.battery.energy -= idle_energy_used
-                self.battery.energy = max(0, self.battery.energy)
-                battery_soc_monitor.tally(self.battery.soc())
-                
                 # After waiting, check battery again
-                self.last_active_start = self.env.now()
                 continue
 
             # Get container and deliver
-            container = ContainerQueue.pop()
-            pickup_time = self.env.now()
+            self.change_state('running')
+            container = env.ContainerQueue.pop()
+            pickup_time = env.now()
 
             # Travel to pickup location
-            pickup_y = random.choice(CONTAINER_PICKUP_RANGE)
-
-            pickup_point = (CONTAINER_PICKUP_X, pickup_y)
+            layout = env.layout
+            pickup_point = layout.quay_node(env.pickup_stream())
+            container.pickup_point = pickup_point
             yield from self.travel_to(pickup_point)
-            yield self.hold(LOADING_TIME)
+            yield self.hold(scenario.loading_time)
 
-            # Travel to delivery location
-            delivery_point = (
-                random.uniform(300, 1300),  # X coordinate (300-1300m)
-                random.uniform(250, 1000)   # Y coordinate (250-1000m)
+            # Travel to the yard slot nearest to a uniform delivery location
+            delivery_point = layout.yard_node(
+                env.delivery_x_stream(),  # X coordinate (300-1300m)
+                env.delivery_y_stream()   # Y coordinate (250-1000m)
             )
+            container.delivery_point = delivery_point
             yield from self.travel_to(delivery_point)
-            yield self.hold(UNLOADING_TIME)
+            yield self.hold(scenario.unloading_time)
 
             self.containers_handled += 1
-            delivery_duration = self.env.now() - pickup_time
-            container_delivery_time_monitor.tally(delivery_duration / 60) # Convert to minutes 
+            delivery_duration = env.now() - pickup_time
+            env.container_delivery_time_monitor.tally(delivery_duration / 60) # Convert to minutes
+            env.containers_delivered += 1
+            env.delivery_minutes_total += delivery_duration / 60
+            container.processed_at = env.now()
+            env.container_time_monitor.tally(container.processed_at - container.created_at)
+            env.record_container_delivery(container.shipment)
 
             # Check if we need to swap battery or can continue
             # Loop will handle battery check at the top
 
 class Container(sim.Component):
-    def setup(self):
+    def setup(self, shipment):
         self.created_at = self.env.now()
+        self.shipment = shipment
+        self.processed_at = None  # Will be set when delivered
 
 class ContainerGenerator(sim.Component):
     def process(self):
-        # Container count distribution
-        count_shape = 8
-        count_scale = 7065 / count_shape  # = 883.125
-
-        # Arrival interval distribution (in days)
-        interval_shape = 3
-        interval_scale = 1 / interval_shape  # ≈ 0.333...
-       
+        env = self.env
+        shipment_tracker = env.shipment_tracker
+
         while True:
+            # A shipment ends any idle period; restart the suspended periodic monitors
+            env.unloading = True
+            env.wake_periodic_monitors()
+
             # Generate number of containers from gamma distribution
-            num_containers = max(1, int(random.gammavariate(count_shape, count_scale)))
-            arrival_time = self.env.now()
-            
+            num_containers = max(1, int(env.shipment_size_stream()))
+            arrival_time = env.now()
+
             # Generate deadline based on shipment size
             # Base deadline: normal distribution with mean 3000 minutes for mean shipment size (7064)
             # Scale the deadline proportionally to shipment size
             size_ratio = num_containers / 7064  # Ratio of this shipment to mean size
-            base_deadline_minutes = random.normalvariate(3000, 1400)  # Mean 3000, range roughly 1400-4600
+            base_deadline_minutes = env.deadline_stream()  # Mean 3000, range roughly 1400-4600
             base_deadline_minutes = max(500, min(7000, base_deadline_minutes))  # Clamp to 500-7000 range
-            
+
             # Scale deadline based on shipment size
             deadline_minutes = base_deadline_minutes * size_ratio
             deadline_minutes = max(100, deadline_minutes)  # Minimum 100 minutes for any shipment
-            
+
             # Create shipment record
             shipment = {
                 'id': shipment_tracker['total_shipments'],
@@ -349,264 +659,811 @@ class ContainerGenerator(sim.Component):
                 'deadline_minutes': deadline_minutes,
                 'deadline_time': arrival_time + (deadline_minutes * 60),  # Convert to seconds
                 'is_on_time': None,  # Will be determined when completed
-                'is_overdue': None
+                'is_overdue': None,
+                'containers_remaining': num_containers
             }
-            
+
             # Add to tracking
-            shipment_tracker['active_shipments'].append(shipment)
+            shipment_tracker['active_shipments'][shipment['id']] = shipment
             shipment_tracker['total_shipments'] += 1
             shipment_tracker['total_containers_received'] += num_containers
             # Record shipment size
-            shipment_size_monitor.tally(num_containers)
+            env.shipment_size_monitor.tally(num_containers)
 
-            # Calculate how many full 6-container cycles are needed
-            cycles = math.ceil(num_containers / 6)  # 6 containers per cycle
+            # Calculate how many crane cycles are needed (one container per crane per cycle)
+            num_cranes = env.scenario.num_cranes
+            cycles = math.ceil(num_containers / num_cranes)
             containers_added = 0
 
-            # Simulate the crane loading containers
+            # Simulate the cranes unloading containers
             for cycle in range(cycles):
-                # Generate cycle time with normal distribution
-                cycle_time = CRANE_CYCLE_TIME
-                
-                # Hold for the cycle time before adding the next batch
+                # Hold for this cycle's duration before adding the next batch
                 if cycle > 0:  # No wait before first batch
-                    yield self.hold(cycle_time)
+                    yield self.hold(env.sample_crane_cycle_time())
 
-                remaining = num_containers - cycle * 6
-                to_unload = min(remaining, 6)  # Unload up to 6 containers per cycle
+                to_unload = min(num_containers - containers_added, num_cranes)
+                env.enqueue_containers(shipment, to_unload)
+                containers_added += to_unload
 
-                # Add containers to queue and immediately reactivate AGVs
-                for _ in range(to_unload):
-                    ContainerQueue.add(Container())
-                    container_queue_monitor.tally(len(ContainerQueue))
-                    containers_added += 1
-            
             # Mark shipment unloading as completed
-            unloading_completion_time = self.env.now()
+            unloading_completion_time = env.now()
             shipment['unloading_completion_time'] = unloading_completion_time
             shipment['unloading_duration'] = unloading_completion_time - shipment['unloading_start_time']
             shipment['unloading_completed'] = True
-            
+            env.unloading = False
+
             # Record unloading duration in a new monitor
-            shipment_unloading_time_monitor.tally(shipment['unloading_duration'] / 60)  # Convert to minutes
-            
+            env.shipment_unloading_time_monitor.tally(shipment['unloading_duration'] / 60)  # Convert to minutes
+
             # Time between shipments
-            interval_days = max(0.01, random.gammavariate(interval_shape, interval_scale))
+            interval_days = max(0.01, env.arrival_interval_stream())
             interval_seconds = interval_days * 24 * 60 * 60
             yield self.hold(interval_seconds)
 
 class SwapperStation(sim.Component):
+    def notify(self):
+        """Wake the station when an AGV or a charged battery becomes available"""
+        if self.ispassive():
+            self.activate()
+
     def process(self):
+        env = self.env
         while True:
-            if len(SwappingQueue) > 0 and len(BatteryQueue) > 0:
-                agv = SwappingQueue.pop()
+            while len(env.SwappingQueue) > 0 and len(env.BatteryQueue) > 0:
+                agv = env.SwappingQueue.pop()
                 agv.activate()
-            yield self.hold(1)
+                yield self.hold(0)  # Let the AGV take its battery before checking again
+            yield self.passivate()  # Woken by notify()
 
 class ChargingStation(sim.Component):
+    """Charges the batteries dropped off in ChargingQueue, all at once
+
+    Each charge is one timed event on the station's own agenda, a heap of (end time, order,
+    battery id, start SOC), so the batteries themselves need no process.
+    """
+    def setup(self):
+        self.charges = []
+        self.charges_started = 0  # Keeps charges ending at the same time in start order
+
+    def notify(self):
+        """Wake the station when a depleted battery is dropped off"""
+        if not self.iscurrent():
+            self.activate()  # Also cuts short the hold until the next charge ends
+
     def process(self):
+        env = self.env
+        charges = self.charges
         while True:
-            if len(ChargingQueue) > 0:
-                battery = ChargingQueue.pop()
-                battery.activate()  # This will resume the battery's process
-                yield self.hold(0)  # Allow immediate processing
+            while len(env.ChargingQueue) > 0:
+                battery = env.ChargingQueue.pop()
+                start_soc = battery.soc()
+                charging_time = battery.start_charge()
+                if charging_time > 0:
+                    env.chargers_busy += 1
+                    heapq.heappush(charges, (env.now() + charging_time, self.charges_started,
+                                             battery.battery_id, start_soc, charging_time))
+                    self.charges_started += 1
+                else:
+                    battery.finish_charge(start_soc, 0)
+
+            while charges and charges[0][0] <= env.now():
+                _, _, battery_id, start_soc, charging_time = heapq.heappop(charges)
+                env.chargers_busy -= 1
+                env.batteries[battery_id].finish_charge(start_soc, charging_time)
+
+            if charges:
+                yield self.hold(till=charges[0][0])  # Until the next charge ends, or notify()
             else:
-                yield self.hold(1)  # Check again later
+                yield self.passivate()  # Woken by notify()
 
-class QueueLengthMonitor(sim.Component):
+class ProgressMonitor(sim.Component):
     def process(self):
+        loading_bar = self.env.loading_bar
         while True:
-            # Update monitors
-            battery_queue_monitor.tally(len(BatteryQueue))
-            container_queue_monitor.tally(len(ContainerQueue))
-            AGV_queue_monitor.tally(len(AGVQueue))
+            loading_bar.update(3600)
+            yield self.hold(3600)  # Update loading bar every simulated hour
 
-            # Update loading bar every minute
-            loading_bar.update(60)
+class PeriodicMonitor(sim.Component):
+    """Component calling tick() every interval seconds, starting at t=0
 
-            yield self.hold(60)  # record every 60 seconds
+    With scenario.fast_forward, a tick that finds the terminal quiescent (see
+    TerminalEnvironment.quiescent) suspends the monitor until the next shipment arrives.
+    Nothing changes while the terminal is quiescent, so the skipped ticks would all have
+    seen the state of the last one; skipped(count) lets a monitor account for them.
+    """
+    interval = 3600
 
-class HourlyQueueMonitor(sim.Component):
     def process(self):
+        env = self.env
+        interval = self.interval
         while True:
-            # Record queue lengths every hour
-            current_time_hours = self.env.now() / 3600  # Convert seconds to hours
-            
-            hourly_queue_data['time'].append(current_time_hours)
-            hourly_queue_data['battery_queue'].append(len(BatteryQueue))
-            hourly_queue_data['container_queue'].append(len(ContainerQueue))
-            hourly_queue_data['agv_queue'].append(len(AGVQueue))
-            hourly_queue_data['swapping_queue'].append(len(SwappingQueue))
-            hourly_queue_data['charging_queue'].append(len(ChargingQueue))
-            
-            yield self.hold(3600)  # Wait 1 hour (3600 seconds)
-
-class ShipmentTracker(sim.Component):
-    """Tracks shipment unloading times and container queue dynamics"""
+            self.tick()
+            if env.scenario.fast_forward and env.quiescent():
+                self.last_tick = env.now()
+                yield self.passivate()  # Woken by env.wake_periodic_monitors()
+                yield from self.resume_ticking()
+            else:
+                yield self.hold(interval)
+
+    def resume_ticking(self):
+        """Return to the original tick grid, after the ticks that fell in the idle period"""
+        ticks = max(1, math.ceil((self.env.now() - self.last_tick) / self.interval))
+        self.skipped(ticks - 1)
+        yield self.hold(till=self.last_tick + ticks * self.interval)
+
+    def resumed_process(self):
+        """Generator continuing the process after a checkpoint restore, suspended or not"""
+        if not self.ispassive():
+            return self.process()
+
+        def resume():
+            yield from self.resume_ticking()
+            yield from self.process()
+        return resume()
+
+    def catch_up(self):
+        """Account for the ticks skipped up to and including now, if the monitor is suspended"""
+        if self.ispassive():
+            count = int((self.env.now() - self.last_tick) // self.interval)
+            self.skipped(count)
+            self.last_tick += count * self.interval
+
+    def tick(self):
+        pass
+
+    def skipped(self, count):
+        pass
+
+class TimeSeriesMonitor(PeriodicMonitor):
     def setup(self):
-        self.queue_was_empty = True  # Start assuming queue is empty
-        self.last_check_time = 0
-    
-    def process(self):
-        while True:
-            current_queue_length = len(ContainerQueue)
-            current_time = self.env.now()
-            
-            # Check if queue just became empty
-            if current_queue_length == 0 and not self.queue_was_empty:
-                self.queue_was_empty = True
-                shipment_tracker['last_queue_empty_time'] = current_time
-                
-                # Complete all active shipments that have finished unloading
-                completed_shipments = []
-                for shipment in shipment_tracker['active_shipments']:
-                    # Only complete shipments that have finished unloading
-                    if shipment.get('unloading_completed', False):
-                        delivery_time = current_time - shipment['arrival_time']
-                        shipment['delivery_time'] = delivery_time
-                        shipment['completion_time'] = current_time
-                        
-                        # Check if shipment was delivered on time
-                        if current_time <= shipment['deadline_time']:
-                            shipment['is_on_time'] = True
-                            shipment['is_overdue'] = False
-                        else:
-                            shipment['is_on_time'] = False
-                            shipment['is_overdue'] = True
-                        
-                        # Record in monitors
-                        shipment_delivery_time_monitor.tally(delivery_time / 3600)  # Convert to hours
-                        
-                        completed_shipments.append(shipment)
-                
-                # Move completed shipments
-                shipment_tracker['completed_shipments'].extend(completed_shipments)
-                # Remove completed shipments from active list
-                shipment_tracker['active_shipments'] = [
-                    s for s in shipment_tracker['active_shipments'] 
-                    if s not in completed_shipments
-                ]
-                
-            # Check if queue has containers (not empty)
-            elif current_queue_length > 0:
-                self.queue_was_empty = False
-            
-            self.last_check_time = current_time
-            yield self.hold(30)  # Check every 30 seconds
-
-class AGVActivator(sim.Component):
-    def process(self):
-        while True:
-            # Only activate AGVs if there are containers waiting
-            if len(ContainerQueue) > 0:
-                # Reactivate idle AGVs that are ready to work
-                agvs_to_activate = []
-                for agv in list(AGVQueue):
-                    if (agv.battery is not None and 
-                        not agv.waiting_for_battery and 
-                        agv.battery.soc() > SOC_MIN):
-                        agvs_to_activate.append(agv)
-                
-                # Activate found AGVs
-                for agv in agvs_to_activate:
-                    AGVQueue.remove(agv)
-                    agv.activate()
-            
-            # Check every 30 seconds (adjust frequency as needed)
-            yield self.hold(30)
-
-# create AGVs and batteries list
-agvs = []
-batteries = []
-
-# Start all batteries fully charged
-for _ in range(NUM_BATTERIES):
-    battery = Battery(soc=100)  # Start fully charged
-    batteries.append(battery)
-    BatteryQueue.add(battery)  # Add to available batteries queue
-
-for _ in range(NUM_AGVS):
-    agv = AGV()
-    agv.activate()
-    agvs.append(agv)
-
-ContainerGenerator().activate()
-SwapperStation().activate()
-ChargingStation().activate()
-QueueLengthMonitor().activate()
-HourlyQueueMonitor().activate()
-ShipmentTracker().activate()
-AGVActivator().activate()
-
-# === RUN SIMULATION ===
-env.run(till=SIM_TIME)
-
-loading_bar.complete()
-
-# print("\n=== AGV STATISTICS ===")
-for agv in agvs:
-    # print(f"{agv.name()} - Battery swaps: {agv.swap_count}, Containers handled: {agv.containers_handled}, Distance traveled: {agv.distance_traveled/1000:.2f} km")
-    swap_monitor.tally(agv.swap_count)
-    container_monitor.tally(agv.containers_handled)
-    distance_monitor.tally(agv.distance_traveled)
-
-# print("\n=== BATTERY STATISTICS ===")
-# for i, battery in enumerate(batteries):
-#     print(f"{battery.name()} - Charge cycles: {battery.charge_cycles}, "
-#           f"Usage count: {battery.usage_count}, "
-#           f"Total energy delivered: {battery.total_energy_delivered:.2f} kWh, "
-#           f"Current SOC: {battery.soc():.1f}%")
-
-print("\n=== AVERAGE BATTERY STATS ===")
-print(f"Avg charge cycles: {sum(b.charge_cycles for b in batteries)/len(batteries):.1f}")
-print(f"Avg usage count: {sum(b.usage_count for b in batteries)/len(batteries):.1f}")
-print(f"Total energy delivered: {sum(b.total_energy_delivered for b in batteries):.1f} kWh")
-print(f"Avg SOC across batteries: {battery_soc_monitor.mean():.1f}%")
-
-print("\n=== AVERAGE AGV STATS ===")
-print(f"Avg Swaps per AGV: {swap_monitor.mean():.2f}")
-print(f"Avg Containers per AGV: {container_monitor.mean():.2f}")
-print(f"Avg Distance per AGV: {distance_monitor.mean()/1000:.2f} km")
+        self.interval = self.env.time_series.interval
+
+    def tick(self):
+        # Record every registered series once per sample interval
+        self.env.time_series.sample(self.env.now())
+
+    def skipped(self, count):
+        self.env.time_series.repeat_last(self.last_tick + np.arange(1, count + 1) * self.interval)
+
+class SOHMonitor(PeriodicMonitor):
+    interval = 3600  # Check every hour
+
+    def setup(self):
+        self.soh_dropped_below_70 = False
+        self.time_below_70 = None
+
+    def tick(self):
+        # Check if the current fleet average SOH dropped below 70%
+        if not self.soh_dropped_below_70 and self.env.battery_fleet.mean_soh() < 70:
+            self.soh_dropped_below_70 = True
+            self.time_below_70 = self.env.now()
+
+# === MODEL ===
+class CheckpointPickler(pickle.Pickler):
+    """Pickles model state, writing shared objects (the environment, travel tables) as references"""
+    def __init__(self, file, shared):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = {id(obj): name for name, obj in shared.items()}
+
+    def persistent_id(self, obj):
+        return self.shared.get(id(obj))
+
+class CheckpointUnpickler(pickle.Unpickler):
+    """Loads what CheckpointPickler wrote, resolving the shared references to the given objects"""
+    def __init__(self, file, shared):
+        super().__init__(file)
+        self.shared = shared
+
+    def persistent_load(self, name):
+        return self.shared[name]
+
+class TerminalEnvironment(sim.Environment):
+    """Environment holding one terminal model: queues, monitors, trackers and components"""
+    # Environment internals that change as the model runs, saved with each checkpoint
+    SALABIM_STATE = ('_now', '_offset', '_seq', '_event_list', 'serial')
+    # Scenario fields a restored run cannot switch, as they shape the state already built
+    FIXED_FIELDS = ('use_container_records', 'use_streaming_monitors', 'yard_slot_spacing', 'road_network',
+                    'sample_interval', 'degradation_profile')
+
+    def setup(self, scenario=None, seed=None):
+        self._salabim_attributes = set(self.__dict__) | {'_salabim_attributes'}
+        if scenario is None:
+            return  # Empty model, filled in by restore()
+
+        self.scenario = scenario
+        self.seed = seed
+        self.degradation = DegradationProfile(scenario.degradation_profile)
+        self.travel = self.travel_tables(scenario)
+        self.layout = self.travel.layout
+
+        # === RANDOM VARIATES ===
+        # One independent, pre-drawn stream per purpose
+        self.variates = VariateService(seed)
+        self.shipment_size_stream = self.variates.stream(
+            'shipment_size', 'gamma', SHIPMENT_SIZE_SHAPE, SHIPMENT_SIZE_MEAN / SHIPMENT_SIZE_SHAPE)
+        self.arrival_interval_stream = self.variates.stream(
+            'arrival_interval', 'gamma', ARRIVAL_INTERVAL_SHAPE, 1 / ARRIVAL_INTERVAL_SHAPE)
+        self.deadline_stream = self.variates.stream('deadline', 'normal', DEADLINE_MEAN, DEADLINE_STD)
+        self.crane_cycle_stream = self.variates.stream(
+            'crane_cycle', 'normal', scenario.crane_cycle_mean, scenario.crane_cycle_std)
+        self.pickup_stream = self.variates.stream('pickup', 'integers', 0, len(self.layout.quay_nodes))
+        self.delivery_x_stream = self.variates.stream('delivery_point_x', 'uniform', *YARD_X_RANGE)
+        self.delivery_y_stream = self.variates.stream('delivery_point_y', 'uniform', *YARD_Y_RANGE)
+        self.loading_bar = (TextLoadingBar(total_steps=scenario.sim_time, description="Simulation Progress")
+                            if scenario.show_progress else None)
+
+        # === MONITORS ===
+        self.battery_soc_monitor = self.trip_monitor("Battery SOC", REPORT_PERCENTILES)
+        self.battery_soh_monitor = self.trip_monitor("Battery SOH")
+        self.battery_charge_cycles_monitor = self.trip_monitor("Battery Charge Cycles")
+
+        self.charging_time_monitor = self.trip_monitor("Battery Charging Time")
+        self.container_delivery_time_monitor = self.trip_monitor("Container Delivery Time")
+        self.container_time_monitor = self.trip_monitor("Container Time in System")
+        self.agv_active_time_monitor = self.trip_monitor("AGV Active Time")
+        self.agv_idle_time_monitor = self.trip_monitor("AGV Idle Time")
+
+        self.distance_monitor = self.trip_monitor("Distance Traveled", REPORT_PERCENTILES)
+        self.travel_time_monitor = self.trip_monitor("Travel Time", REPORT_PERCENTILES)
+
+        self.shipment_size_monitor = sim.Monitor("Shipment Sizes", env=self)
+        self.shipment_delivery_time_monitor = sim.Monitor("Shipment Delivery Times", env=self)
+        self.shipment_unloading_time_monitor = sim.Monitor("Shipment Unloading Times", env=self)
+
+        # === TIME SERIES ===
+        self.chargers_busy = 0  # Batteries currently on a charger
+        self.unloading = False  # A ship is being unloaded by the cranes
+        self.containers_delivered = 0  # Running totals, sampled for the steady-state delivery times
+        self.statistics_start = 0.0  # Moved to the warm-up end by reset_statistics()
+        self.delivery_minutes_total = 0.0
+        self.time_series = TimeSeriesRecorder(horizon=scenario.sim_time, interval=scenario.sample_interval)
+
+        # Shipment tracking data structure
+        self.shipment_tracker = {
+            'active_shipments': {},  # Active shipment dictionaries keyed by shipment id
+            'completed_shipments': [],  # List of completed shipments, in completion order
+            'total_shipments': 0,
+            'total_containers_received': 0
+        }
+
+        # === QUEUES ===
+        self.BatteryQueue = Buffer("AvailableBatteries", env=self)
+        self.ContainerQueue = (Buffer("ContainerQueue", env=self) if scenario.use_container_records
+                               else self.queue("ContainerQueue"))
+        self.SwappingQueue = self.queue("SwappingQueue")
+        self.ChargingQueue = Buffer("ChargingQueue", env=self)
+        self.AGVQueue = self.queue("IdleAGVs")
+
+        # Probes are partials rather than lambdas, so checkpoints can pickle them
+        self.time_series.register('battery_queue', partial(len, self.BatteryQueue), dtype=np.int32)
+        self.time_series.register('container_queue', partial(len, self.ContainerQueue), dtype=np.int32)
+        self.time_series.register('agv_queue', partial(len, self.AGVQueue), dtype=np.int32)
+        self.time_series.register('swapping_queue', partial(len, self.SwappingQueue), dtype=np.int32)
+        self.time_series.register('charging_queue', partial(len, self.ChargingQueue), dtype=np.int32)
+        self.time_series.register('chargers_busy', partial(getattr, self, 'chargers_busy'), dtype=np.int32)
+        self.time_series.register('fleet_soc', self.fleet_soc)
+        self.time_series.register('containers_delivered', partial(getattr, self, 'containers_delivered'),
+                                  dtype=np.int64)
+        self.time_series.register('delivery_minutes_total', partial(getattr, self, 'delivery_minutes_total'))
+
+        # create AGVs and batteries list
+        self.agvs = []
+        self.batteries = []
+
+        # Start all batteries fully charged
+        self.battery_fleet = BatteryFleet(scenario.num_batteries, scenario.battery_capacity, len(self.degradation))
+        for battery_id in range(scenario.num_batteries):
+            battery = Battery(env=self, battery_id=battery_id, soc=100)  # Start fully charged
+            self.batteries.append(battery)
+            self.BatteryQueue.add(battery)  # Add to available batteries queue
+
+        for _ in range(scenario.num_agvs):
+            agv = AGV(env=self)
+            agv.activate()
+            self.agvs.append(agv)
+
+        self.container_generator = ContainerGenerator(env=self)
+        self.container_generator.activate()
+        self.swapper_station = SwapperStation(env=self)
+        self.swapper_station.activate()
+        self.charging_station = ChargingStation(env=self)
+        self.charging_station.activate()
+        self.progress_monitor = ProgressMonitor(env=self) if self.loading_bar is not None else None
+        if self.progress_monitor is not None:
+            self.progress_monitor.activate()
+        self.time_series_monitor = TimeSeriesMonitor(env=self)
+        self.time_series_monitor.activate()
+        self.soh_monitor = SOHMonitor(env=self)
+        self.soh_monitor.activate()
+        self.periodic_monitors = [self.time_series_monitor, self.soh_monitor]
+        self.stop_state_monitors(self.components())
+
+    def quiescent(self):
+        """No ship unloading, no container waiting, no battery charging and every AGV idle
+
+        Until the next shipment arrives nothing in the terminal can change then: idle AGVs
+        only drain their batteries, and that is booked analytically when they wake up.
+        """
+        return (not self.unloading and len(self.ContainerQueue) == 0 and self.chargers_busy == 0
+                and len(self.AGVQueue) == len(self.agvs))
+
+    @staticmethod
+    def stop_state_monitors(components):
+        """Stop recording the status and mode history of components, which nothing reads
+
+        Left on, these grow with every state change and so with the length of the run.
+        """
+        for component in components:
+            component.status.monitor(False)
+            component.mode.monitor(False)
+
+    def wake_periodic_monitors(self):
+        for monitor in self.periodic_monitors:
+            if monitor.ispassive():
+                monitor.activate()
+
+    @staticmethod
+    def travel_tables(scenario):
+        """Cached travel tables of the scenario's layout; their .layout is the layout itself"""
+        layout = build_layout(SWAPPING_STATION, CONTAINER_PICKUP_X, tuple(CONTAINER_PICKUP_RANGE),
+                              YARD_X_RANGE, YARD_Y_RANGE, scenario.yard_slot_spacing, scenario.road_network)
+        return build_travel_tables(layout, scenario.agv_speed, scenario.power_consumption)
+
+    def components(self):
+        """Every component with a process"""
+        components = [*self.agvs, self.container_generator, self.swapper_station,
+                      self.charging_station, *self.periodic_monitors]
+        if self.progress_monitor is not None:
+            components.append(self.progress_monitor)
+        return components
+
+    def checkpoint(self, path):
+        """Write the complete model state to path, replacing any earlier checkpoint there
+
+        Generator processes cannot be pickled, so checkpoints are only taken while the terminal
+        is quiescent: every component then waits at a point restore() can continue from (see
+        the resumed_process() methods; all other components are at the top of their loop).
+        """
+        if not self.quiescent():
+            raise RuntimeError("Checkpoints can only be taken while the terminal is quiescent")
+
+        components = self.components()
+        processes = [component._process for component in components]
+        for component in components:
+            component._process = None
+        try:
+            header = {**self.checkpoint_versions(), 'scenario': self.scenario, 'seed': self.seed,
+                      'time': self.now()}
+            state = {
+                'random_state': random.getstate(),
+                'salabim': {name: value for name, value in self.__dict__.items()
+                            if name in self.SALABIM_STATE or name.startswith('_nameserialize')},
+                'model': {name: value for name, value in self.__dict__.items()
+                          if name not in self._salabim_attributes}
+            }
+            shared = {'env': self, 'main': self._main, 'travel': self.travel, 'layout': self.layout}
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"  # An interrupted write never replaces a good checkpoint
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(header, f)
+                CheckpointPickler(f, shared).dump(state)
+            os.replace(tmp_path, path)
+        finally:
+            for component, process in zip(components, processes):
+                component._process = process
+
+    @staticmethod
+    def checkpoint_versions():
+        """Versions a checkpoint must be restored with: its format and the libraries it relies on
+
+        Checkpoints hold salabim's private scheduler state and NumPy bit-generator states,
+        which need not mean the same under another version of either library.
+        """
+        return {'version': CHECKPOINT_VERSION, 'salabim_version': sim.__version__, 'numpy_version': np.__version__}
+
+    @staticmethod
+    def checkpoint_header(path):
+        """Versions, scenario, seed and simulation time of the checkpoint at path"""
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    @classmethod
+    def restore(cls, path, scenario=None):
+        """Environment continuing bit-identically from the checkpoint at path
+
+        With scenario given, the run continues under that scenario instead: a what-if branch
+        from the checkpoint (see switch_scenario).
+        """
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            for name, expected in cls.checkpoint_versions().items():
+                if header.get(name) != expected:
+                    raise ValueError(f"Checkpoint {path} has {name} {header.get(name, 'unknown')}, expected {expected}")
+            env = cls(trace=False, yieldless=False)
+            travel = cls.travel_tables(header['scenario'])
+            shared = {'env': env, 'main': env._main, 'travel': travel, 'layout': travel.layout}
+            state = CheckpointUnpickler(f, shared).load()
+
+        random.setstate(state['random_state'])
+        env.__dict__.update(state['salabim'])
+        env.__dict__.update(state['model'])
+        for component in env.components():
+            resumed = getattr(component, 'resumed_process', component.process)
+            component._process = resumed()
+            component._process_isgenerator = True
+        if scenario is not None:
+            env.switch_scenario(scenario)
+        return env
+
+    def switch_scenario(self, scenario):
+        """Continue under a modified scenario; only valid right after restore()
+
+        Components read their parameters from self.scenario when their process starts, which
+        for a restored environment is after this call. The crane cycle stream switches to the
+        new mean and standard deviation. AGVs and batteries can be added, not removed; a new
+        battery_capacity only applies to the added batteries, as the existing ones keep their
+        (degraded) capacity. The FIXED_FIELDS cannot change.
+        """
+        old = self.scenario
+        changed = [name for name in self.FIXED_FIELDS if getattr(scenario, name) != getattr(old, name)]
+        if changed:
+            raise ValueError(f"A restored run cannot change {', '.join(changed)}")
+        if scenario.num_agvs < old.num_agvs or scenario.num_batteries < old.num_batteries:
+            raise ValueError("A restored run can add AGVs and batteries, not remove them")
+
+        self.scenario = scenario
+        self.travel = self.travel_tables(scenario)
+        if (scenario.crane_cycle_mean, scenario.crane_cycle_std) != (old.crane_cycle_mean, old.crane_cycle_std):
+            self.crane_cycle_stream.set_params(scenario.crane_cycle_mean, scenario.crane_cycle_std)
+
+        new_batteries = scenario.num_batteries - old.num_batteries
+        new_agvs = scenario.num_agvs - old.num_agvs
+        if new_batteries > 0:
+            self.battery_fleet.extend(new_batteries, scenario.battery_capacity)
+            for battery_id in range(old.num_batteries, scenario.num_batteries):
+                battery = Battery(env=self, battery_id=battery_id, soc=100)
+                self.batteries.append(battery)
+                self.BatteryQueue.add(battery)
+            self.swapper_station.notify()
+        for _ in range(new_agvs):
+            agv = AGV(env=self)
+            self.stop_state_monitors([agv])
+            agv.activate()
+            self.agvs.append(agv)
+        if new_batteries > 0 or new_agvs > 0:
+            self.wake_periodic_monitors()  # The terminal is no longer quiescent
+
+    def run_to_checkpoint(self, at, path, till=math.inf):
+        """Run to the first quiescent moment from at onwards and write a checkpoint to path there
+
+        Quiescence is checked every sample interval. Stops without a checkpoint at till;
+        returns whether a checkpoint was written.
+        """
+        self.run(till=min(at, till))
+        while self.now() < till and not self.quiescent():
+            self.run(till=min(self.now() + self.scenario.sample_interval, till))
+        if self.now() >= till:
+            return False
+        self.checkpoint(path)
+        return True
+
+    def run_with_checkpoints(self, till, path, interval=CHECKPOINT_INTERVAL):
+        """Run until till, writing a checkpoint to path about every interval seconds"""
+        while self.now() < till:
+            self.run_to_checkpoint(self.now() + interval, path, till)
+
+    def queue(self, name):
+        """sim.Queue recording its length in a LevelHistogram, in memory bounded by the longest queue
+
+        sim.Queue's own level monitors keep every change of the length, and so grow with the
+        run and every checkpoint. The length of stay and the available capacity are not
+        reported and not recorded.
+        """
+        queue = sim.Queue(name, env=self)
+        queue.length = LevelHistogram(f"Length of {name}", env=self)
+        queue.length_of_stay.monitor(False)
+        queue.available_quantity.monitor(False)
+        return queue
+
+    def trip_monitor(self, name, percentiles=()):
+        """Monitor tallied per trip, container, charge or wake-up; streaming unless disabled in the scenario
+
+        Only the shipment monitors, tallied once per ship, keep every value. Percentile
+        estimates cost more per tally than the rest together, so a streaming monitor only
+        tracks the percentiles that are reported.
+        """
+        if self.scenario.use_streaming_monitors:
+            return StreamingMonitor(name, percentiles=percentiles)
+        return sim.Monitor(name, env=self)
+
+    def reset_statistics(self):
+        """Restart the monitors, queue length statistics and completed shipments from now
+
+        Only statistics are cleared, not model state, so the run continues exactly as it
+        would have; run_until_steady calls this at the warm-up end to leave the transient out.
+        """
+        for monitor in (self.battery_soc_monitor, self.battery_soh_monitor, self.battery_charge_cycles_monitor,
+                        self.charging_time_monitor, self.container_delivery_time_monitor, self.container_time_monitor,
+                        self.agv_active_time_monitor, self.agv_idle_time_monitor, self.distance_monitor,
+                        self.travel_time_monitor, self.shipment_size_monitor, self.shipment_delivery_time_monitor,
+                        self.shipment_unloading_time_monitor):
+            monitor.reset()
+        for queue in (self.BatteryQueue, self.ContainerQueue, self.AGVQueue, self.SwappingQueue, self.ChargingQueue):
+            queue.length.reset()
+        self.shipment_tracker['completed_shipments'] = []
+        self.statistics_start = self.now()
+
+    def fleet_soc(self):
+        """Average SOC over all batteries, whether in an AGV, charging or waiting"""
+        return self.battery_fleet.mean_soc()
+
+    def sample_crane_cycle_time(self):
+        """Draw the duration of one crane cycle, clamped to the 60-180 s range"""
+        scenario = self.scenario
+        cycle_time = self.crane_cycle_stream()
+        return max(scenario.crane_cycle_min, min(scenario.crane_cycle_max, cycle_time))
+
+    def enqueue_containers(self, shipment, count):
+        """Add one crane cycle's containers to ContainerQueue as a single batch"""
+        if self.scenario.use_container_records:
+            now = self.now()
+            self.ContainerQueue.extend([ContainerRecord(now, shipment) for _ in range(count)])
+        else:
+            for _ in range(count):
+                self.ContainerQueue.add(Container(env=self, shipment=shipment))
+        self.dispatch_idle_agvs(count)
+
+    def dispatch_idle_agvs(self, num_containers):
+        """Wake one eligible idle AGV per newly queued container"""
+        woken = 0
+        skipped = []
+        while woken < num_containers and len(self.AGVQueue) > 0:
+            agv = self.AGVQueue.pop()
+            if (agv.battery is not None and
+                not agv.waiting_for_battery and
+                agv.battery.soc() > self.scenario.soc_min):
+                agv.activate()
+                woken += 1
+            else:
+                skipped.append(agv)
+
+        # Keep AGVs that could not take work at the front, in their original order
+        for agv in reversed(skipped):
+            self.AGVQueue.add_at_head(agv)
+
+    def record_container_delivery(self, shipment):
+        """Count a delivered container against its shipment, completing it on the last one"""
+        shipment['containers_remaining'] -= 1
+        if shipment['containers_remaining'] > 0:
+            return
+
+        current_time = self.now()
+        shipment['delivery_time'] = current_time - shipment['arrival_time']
+        shipment['completion_time'] = current_time
+        shipment['is_on_time'] = current_time <= shipment['deadline_time']
+        shipment['is_overdue'] = not shipment['is_on_time']
+        self.shipment_delivery_time_monitor.tally(shipment['delivery_time'] / 3600)  # Convert to hours
+
+        del self.shipment_tracker['active_shipments'][shipment['id']]
+        self.shipment_tracker['completed_shipments'].append(shipment)
+
+    def results(self, seed):
+        """Collect the KPIs of the run so far into a Results object"""
+        agvs = self.agvs
+        batteries = self.batteries
+        fleet = self.battery_fleet
+        for agv in agvs:
+            agv.change_state(agv.current_state)  # Book the time spent in the current state
+        for monitor in self.periodic_monitors:
+            monitor.catch_up()
+
+        agv_stats = [{
+            'agv_id': agv.name(),
+            'idle_time': agv.idle_time,
+            'running_time': agv.running_time,
+            'swapping_time': agv.swapping_time,
+            'distance': agv.distance_traveled,
+            'swaps': agv.swap_count,
+            'containers': agv.containers_handled
+        } for agv in agvs]
+        battery_stats = [{
+            'battery_id': battery.name(),
+            'charge_cycles': charge_cycles,
+            'usage_count': usage_count,
+            'total_energy_delivered': total_energy_delivered,
+            'soc': soc,
+            'soh': soh,
+            'cycles_in_range': dict(zip(self.degradation.labels, cycles_in_range))
+        } for battery, charge_cycles, usage_count, total_energy_delivered, soc, soh, cycles_in_range in zip(
+            batteries, fleet.charge_cycles.tolist(), fleet.usage_count.tolist(),
+            fleet.total_energy_delivered.tolist(), fleet.soc().tolist(), fleet.soh.tolist(),
+            fleet.cycles_in_range.tolist())]
+
+        return Results(
+            scenario=self.scenario,
+            seed=seed,
+            sim_time=self.now(),
+            avg_battery_soc=self.battery_soc_monitor.mean(),
+            monitor_percentiles={
+                monitor.name(): {q: monitor.percentile(q) for q in REPORT_PERCENTILES}
+                for monitor in (self.battery_soc_monitor, self.distance_monitor, self.travel_time_monitor)
+            },
+            avg_battery_soh=self.battery_soh_monitor.mean(),
+            avg_charging_time_min=self.charging_time_monitor.mean() / 60,
+            avg_agv_idle_time_min=self.agv_idle_time_monitor.mean() / 60,
+            avg_agv_active_time_min=self.agv_active_time_monitor.mean() / 60,
+            avg_container_delivery_time_min=self.container_delivery_time_monitor.mean(),
+            avg_container_time_in_system_min=self.container_time_monitor.mean() / 60,
+            avg_battery_queue=self.BatteryQueue.length.mean(),
+            avg_container_queue=self.ContainerQueue.length.mean(),
+            avg_agv_queue=self.AGVQueue.length.mean(),
+            queue_stats={
+                name: {
+                    'mean': queue.length.mean(),
+                    'max': queue.length.maximum(),
+                    **{f"p{q}": queue.length.percentile(q) for q in REPORT_PERCENTILES}
+                }
+                for name, queue in (('battery_queue', self.BatteryQueue),
+                                    ('container_queue', self.ContainerQueue),
+                                    ('agv_queue', self.AGVQueue),
+                                    ('swapping_queue', self.SwappingQueue),
+                                    ('charging_queue', self.ChargingQueue))
+            },
+            avg_charge_cycles=float(fleet.charge_cycles.mean()),
+            avg_usage_count=float(fleet.usage_count.mean()),
+            total_energy_delivered_kwh=float(fleet.total_energy_delivered.sum()),
+            avg_swaps_per_agv=sum(a.swap_count for a in agvs) / len(agvs),
+            avg_containers_per_agv=sum(a.containers_handled for a in agvs) / len(agvs),
+            avg_distance_per_agv_km=sum(a.distance_traveled for a in agvs) / len(agvs) / 1000,
+            soh_below_70_time=self.soh_monitor.time_below_70,
+            total_shipments=self.shipment_tracker['total_shipments'],
+            total_containers_received=self.shipment_tracker['total_containers_received'],
+            shipment_sizes=list(self.shipment_size_monitor.x()),
+            completed_shipments=list(self.shipment_tracker['completed_shipments']),
+            active_shipments=list(self.shipment_tracker['active_shipments'].values()),
+            time_series=self.time_series.to_dict(),
+            agv_stats=agv_stats,
+            battery_stats=battery_stats,
+            statistics_start=self.statistics_start
+        )
+
+def run_simulation(scenario=None, seed=42, checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """Build a fresh model for scenario, run it for scenario.sim_time and return its Results
+
+    With checkpoint_path set, the model state is saved there about every checkpoint_interval
+    seconds of simulated time; see resume_simulation.
+    """
+    if scenario is None:
+        scenario = Scenario()
+    env = TerminalEnvironment(trace=False, random_seed=seed, yieldless=False, scenario=scenario, seed=seed)
+    if checkpoint_path is None:
+        env.run(till=scenario.sim_time)
+    else:
+        env.run_with_checkpoints(scenario.sim_time, checkpoint_path, checkpoint_interval)
+    if env.loading_bar is not None:
+        env.loading_bar.complete()
+    return env.results(seed)
+
+def resume_simulation(checkpoint_path, sim_time=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """Continue the run saved at checkpoint_path and return its Results
+
+    The run continues until sim_time, by default the horizon of its scenario; a longer
+    sim_time extends the horizon. Results are bit-identical to those of an uninterrupted run
+    with the same horizon. The resumed run keeps checkpointing to checkpoint_path.
+    """
+    env = TerminalEnvironment.restore(checkpoint_path)
+    if sim_time is not None:
+        env.scenario = replace(env.scenario, sim_time=sim_time)
+    env.run_with_checkpoints(env.scenario.sim_time, checkpoint_path, checkpoint_interval)
+    if env.loading_bar is not None:
+        env.loading_bar.complete()
+    return env.results(env.seed)
+
+def run_until_steady(scenario=None, seed=42, relative_precision=STEADY_STATE_PRECISION,
+                     check_interval=STEADY_STATE_CHECK_INTERVAL):
+    """Run until the steady-state estimates converge, or for at most scenario.sim_time
+
+    Every check_interval the time series is checked: once the warm-up end is detected and
+    every series in steady_state.CONVERGENCE_SERIES has a batch-means CI half-width within
+    relative_precision of its mean, the run stops there. Results.sim_time is the time the
+    run actually stopped.
+
+    The warm-up end is only known afterwards, so the run is then replayed with the same seed
+    up to the warm-up end, where the statistics are reset (see reset_statistics), and on to
+    the stop time. The headline KPIs so leave the transient out; Results.statistics_start
+    is the warm-up end.
+    """
+    if scenario is None:
+        scenario = Scenario()
+    env = TerminalEnvironment(trace=False, random_seed=seed, yieldless=False, scenario=scenario, seed=seed)
+    till = 0
+    warmup_hours = None
+    while till < scenario.sim_time:
+        till = min(till + check_interval, scenario.sim_time)
+        env.run(till=till)
+        env.time_series_monitor.catch_up()
+        summary = steady_state_summary(env.time_series, env.shipment_tracker['completed_shipments'])
+        warmup_hours = summary['warmup_hours']
+        if converged(summary, relative_precision):
+            break
+    if env.loading_bar is not None:
+        env.loading_bar.complete()
+
+    if warmup_hours:
+        env = TerminalEnvironment(trace=False, random_seed=seed, yieldless=False, scenario=scenario, seed=seed)
+        env.run(till=warmup_hours * 3600)
+        env.reset_statistics()
+        env.run(till=till)
+        if env.loading_bar is not None:
+            env.loading_bar.complete()
+    return env.results(seed)
 
 # === SIMULATION RESULTS ===
-def print_results():
+def print_fleet_statistics(results):
+    print("\n=== AVERAGE BATTERY STATS ===")
+    print(f"Avg charge cycles: {results.avg_charge_cycles:.1f}")
+    print(f"Avg usage count: {results.avg_usage_count:.1f}")
+    print(f"Total energy delivered: {results.total_energy_delivered_kwh:.1f} kWh")
+    print(f"Avg SOC across batteries: {results.avg_battery_soc:.1f}%")
+
+    print("\n=== AVERAGE AGV STATS ===")
+    print(f"Avg Swaps per AGV: {results.avg_swaps_per_agv:.2f}")
+    print(f"Avg Containers per AGV: {results.avg_containers_per_agv:.2f}")
+    print(f"Avg Distance per AGV: {results.avg_distance_per_agv_km:.2f} km")
+
+def print_results(results):
     print("\n=== SIMULATION RESULTS ===")
-    print(f"Battery SOC - avg: {battery_soc_monitor.mean():.2f} %")
-    print(f"Battery SOH - avg: {battery_soh_monitor.mean():.2f} %")
-    print(f"Charging Time - avg: {charging_time_monitor.mean()/60:.2f} min")
-    print(f"AGV Idle Time - avg: {agv_idle_time_monitor.mean()/60:.2f} min")
-    print(f"AGV Active Time - avg: {agv_active_time_monitor.mean()/60:.2f} min")
-    print(f"Container Delivery Time - avg: {container_delivery_time_monitor.mean():.2f} min")
-    print(f"Battery Queue - avg length: {battery_queue_monitor.mean():.2f}")
-    print(f"Container Queue - avg length: {container_queue_monitor.mean():.2f}")
-    print(f"AGV Queue - avg length: {AGV_queue_monitor.mean():.2f}")
-
-def print_shipment_statistics():
+    if results.statistics_start > 0:
+        print(f"(Monitors and queues from hour {results.statistics_start / 3600:.1f} on, warm-up removed)")
+    print(f"Battery SOC - avg: {results.avg_battery_soc:.2f} %")
+    print(f"Battery SOH - avg: {results.avg_battery_soh:.2f} %")
+    print(f"Charging Time - avg: {results.avg_charging_time_min:.2f} min")
+    print(f"AGV Idle Time - avg: {results.avg_agv_idle_time_min:.2f} min")
+    print(f"AGV Active Time - avg: {results.avg_agv_active_time_min:.2f} min")
+    print(f"Container Delivery Time - avg: {results.avg_container_delivery_time_min:.2f} min")
+    print(f"Container Time in System - avg: {results.avg_container_time_in_system_min:.2f} min")
+    print(f"Battery Queue - avg length: {results.avg_battery_queue:.2f}")
+    print(f"Container Queue - avg length: {results.avg_container_queue:.2f}")
+    print(f"AGV Queue - avg length: {results.avg_agv_queue:.2f}")
+
+    soc = results.monitor_percentiles["Battery SOC"]
+    distance = results.monitor_percentiles["Distance Traveled"]
+    travel_time = results.monitor_percentiles["Travel Time"]
+    print(f"Battery SOC - p5/p50/p95: {soc[5]:.2f} / {soc[50]:.2f} / {soc[95]:.2f} %")
+    print(f"Trip Distance - p5/p50/p95: {distance[5]:.0f} / {distance[50]:.0f} / {distance[95]:.0f} m")
+    print(f"Trip Travel Time - p5/p50/p95: {travel_time[5]/60:.2f} / {travel_time[50]/60:.2f} / {travel_time[95]/60:.2f} min")
+
+    print("\n=== QUEUE LENGTHS (time-weighted) ===")
+    for name, stats in results.queue_stats.items():
+        print(f"{name.replace('_', ' ').title().replace('Agv', 'AGV')} - avg: {stats['mean']:.2f}, max: {stats['max']:.0f}, "
+              f"p50: {stats['p50']:.0f}, p95: {stats['p95']:.0f}")
+
+def print_shipment_statistics(results):
     print("\n=== SHIPMENT STATISTICS ===")
-    print(f"Total Shipments: {shipment_tracker['total_shipments']}")
-    completed_count = len(shipment_tracker['completed_shipments'])
-    active_count = len(shipment_tracker['active_shipments'])
+    print(f"Total Shipments: {results.total_shipments}")
+    completed_count = len(results.completed_shipments)
+    active_count = len(results.active_shipments)
     print(f"Completed Shipments: {completed_count}")
     print(f"Active Shipments: {active_count}")
-        
-    if shipment_size_monitor.number_of_entries() > 0:
-        print(f"Average Shipment Size: {shipment_size_monitor.mean():.2f} containers")
-        shipment_sizes = shipment_size_monitor.x()  # Call the method to get the list
+
+    if results.shipment_sizes:
+        shipment_sizes = results.shipment_sizes
+        print(f"Average Shipment Size: {sum(shipment_sizes) / len(shipment_sizes):.2f} containers")
         print(f"Max Shipment Size: {max(shipment_sizes):.0f} containers")
         print(f"Min Shipment Size: {min(shipment_sizes):.0f} containers")
-        
-    if shipment_delivery_time_monitor.number_of_entries() > 0:
-        print(f"Average Shipment Delivery Time: {shipment_delivery_time_monitor.mean():.2f} hours")
-        delivery_times = shipment_delivery_time_monitor.x()  # Call the method to get the list
+
+    if results.completed_shipments:
+        delivery_times = [s['delivery_time'] / 3600 for s in results.completed_shipments]
+        print(f"Average Shipment Delivery Time: {sum(delivery_times) / len(delivery_times):.2f} hours")
         print(f"Max Shipment Delivery Time: {max(delivery_times):.2f} hours")
         print(f"Min Shipment Delivery Time: {min(delivery_times):.2f} hours")
     """Analyze shipment patterns and overlaps"""
-    if not shipment_tracker['completed_shipments']:
+    if not results.completed_shipments:
         print("No completed shipments to analyze.")
         return
-    
-    completed = shipment_tracker['completed_shipments']
-     
+
+    completed = results.completed_shipments
+
     # Calculate overlaps
     overlapping_shipments = 0
     for i, shipment in enumerate(completed):
@@ -615,104 +1472,197 @@ def print_shipment_statistics():
             next_shipment = completed[i + 1]
             if next_shipment['arrival_time'] < shipment['completion_time']:
                 overlapping_shipments += 1
-    
+
     print(f"Shipments with Overlaps: {overlapping_shipments} out of {len(completed)} ({overlapping_shipments/len(completed)*100:.1f}%)")
-        
-    # Additional detailed statistics
-    if shipment_tracker['completed_shipments']:
-        print("\n=== DETAILED SHIPMENT ANALYSIS ===")
-        received = shipment_tracker['total_containers_received']
-        completed = shipment_tracker['completed_shipments']
-            
-        total_containers = sum(s['size'] for s in completed)
-        avg_size = total_containers / len(completed)
-        avg_delivery_hours = sum(s['delivery_time'] for s in completed) / len(completed) / 3600
-            
-        print(f"Total Containers Received: {received}")
-        print(f"Total Containers Delivered in Completed Shipments: {total_containers}")
-        print(f"Average Containers per Completed Shipment: {avg_size:.2f}")
-        print(f"Average Delivery Time for Completed Shipments: {avg_delivery_hours:.2f} hours")
-            
-        # Show some examples of recent shipments
-        print("\n=== RECENT COMPLETED SHIPMENTS (Last 5) ===")
-        for shipment in completed[-5:]:
-            status = "ON TIME" if shipment['is_on_time'] else f"OVERDUE (delay: {(shipment['completion_time'] - shipment['deadline_time']) / 60:.1f} min)"
-            print(
-                f"Shipment {shipment['id']}: {shipment['size']} containers, "
-                f"{shipment['unloading_duration'] / 60:.1f} min unloading, "
-                f"{(shipment['delivery_time'] / 3600):.1f} hours delivery, "
-                f"deadline: {(shipment['deadline_minutes'] / 60):.1f} hours, {status}"
-            )
 
-def print_delivery_performance():
-    completed_shipments = shipment_tracker['completed_shipments']
-    
-    if not completed_shipments:
+    # Additional detailed statistics
+    print("\n=== DETAILED SHIPMENT ANALYSIS ===")
+    received = results.total_containers_received
+
+    total_containers = sum(s['size'] for s in completed)
+    avg_size = total_containers / len(completed)
+    avg_delivery_hours = sum(s['delivery_time'] for s in completed) / len(completed) / 3600
+
+    print(f"Total Containers Received: {received}")
+    print(f"Total Containers Delivered in Completed Shipments: {total_containers}")
+    print(f"Average Containers per Completed Shipment: {avg_size:.2f}")
+    print(f"Average Delivery Time for Completed Shipments: {avg_delivery_hours:.2f} hours")
+
+    # Show some examples of recent shipments
+    print("\n=== RECENT COMPLETED SHIPMENTS (Last 5) ===")
+    for shipment in completed[-5:]:
+        status = "ON TIME" if shipment['is_on_time'] else f"OVERDUE (delay: {(shipment['completion_time'] - shipment['deadline_time']) / 60:.1f} min)"
+        print(
+            f"Shipment {shipment['id']}: {shipment['size']} containers, "
+            f"{shipment['unloading_duration'] / 60:.1f} min unloading, "
+            f"{(shipment['delivery_time'] / 3600):.1f} hours delivery, "
+            f"deadline: {(shipment['deadline_minutes'] / 60):.1f} hours, {status}"
+        )
+
+def print_delivery_performance(results):
+    if not results.completed_shipments:
         print("\n=== DELIVERY PERFORMANCE ===\nNo shipments completed yet")
         return
-    
-    # Calculate performance metrics
-    on_time = [s for s in completed_shipments if s['is_on_time']]
-    overdue = [s for s in completed_shipments if s['is_overdue']]
-    
-    total_shipments = len(completed_shipments)
-    on_time_pct = (len(on_time) / total_shipments) * 100 if total_shipments > 0 else 0
-    overdue_pct = 100 - on_time_pct
-    
-    avg_delay = (sum((s['completion_time'] - s['deadline_time']) / 60 
-                for s in overdue) / len(overdue)) if overdue else 0
-    
+
+    performance = results.delivery_performance()
+
     # Print performance summary
     print("\n=== DELIVERY PERFORMANCE ===")
-    print(f"Shipments Delivered ON TIME: {len(on_time)} ({on_time_pct:.1f}%)")
-    print(f"Shipments Delivered OVERDUE: {len(overdue)} ({overdue_pct:.1f}%)")
-    print(f"Average Delay for Overdue Shipments: {avg_delay:.1f} minutes")
+    print(f"Shipments Delivered ON TIME: {performance['on_time']} ({performance['on_time_pct']:.1f}%)")
+    print(f"Shipments Delivered OVERDUE: {performance['overdue']} ({performance['overdue_pct']:.1f}%)")
+    print(f"Average Delay for Overdue Shipments: {performance['avg_delay_min']:.1f} minutes")
+
+def print_steady_state(results):
+    summary = results.steady_state()
+    print(f"\n=== STEADY STATE (warm-up removed, {summary['confidence']:.0%} batch-means CI) ===")
+    if summary['warmup_hours'] is None:
+        print("Warm-up not determined: run too short, estimates below include the transient")
+    else:
+        print(f"Warm-up (MSER-5): first {summary['warmup_hours']:.1f} hours discarded")
+    for name, stats in summary['series'].items():
+        label = name.replace('_pct', ' %').replace('_', ' ').title().replace('Agv', 'AGV').replace('Soc', 'SOC')
+        if stats['correlated'] is None:
+            print(f"{label} - avg: {stats['mean']:.2f} (only {stats['n']} values, too few for a CI)")
+            continue
+        print(f"{label} - avg: {stats['mean']:.2f} \u00b1 {stats['half_width']:.2f} "
+              f"({stats['num_batches']} batches of {stats['batch_size']}, lag-1 corr {stats['lag1']:.2f})"
+              + (" WARNING: batches too correlated, run longer or use replications" if stats['correlated'] else ""))
+
+def print_report(results):
+    print_fleet_statistics(results)
+    print_results(results)
+    print_steady_state(results)
+    print_shipment_statistics(results)
+    print_delivery_performance(results)
+
+def plot_queue_lengths(results, save_path=None):
+    """Plot the queue lengths over time; saved to save_path if given, shown otherwise"""
+    if save_path is not None:
+        import matplotlib
+        matplotlib.use('Agg')  # Render off-screen on machines without a display
+    import matplotlib.pyplot as plt
+
+    time_series = results.time_series
 
-def plot_queue_lengths():
     # Convert time to days for better readability
-    time_days = np.array(hourly_queue_data['time']) / 24
-    
+    time_days = time_series['time'] / 24
+
     # Also create a separate figure with normalized view (log scale for container queue)
     plt.figure(figsize=(15, 8))
-    
+
     plt.subplot(2, 1, 1)
-    plt.plot(time_days, hourly_queue_data['container_queue'], 'b-', linewidth=2, label='Container Queue')
+    plt.plot(time_days, time_series['container_queue'], 'b-', linewidth=2, label='Container Queue')
     plt.title('Container Queue Length (Linear Scale)')
     plt.xlabel('Time (days)')
     plt.ylabel('Queue Length')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    
+
     plt.subplot(2, 1, 2)
     # Plot other queues without container queue for better visibility
-    plt.plot(time_days, hourly_queue_data['battery_queue'], 'g-', label='Battery Queue', linewidth=2)
-    plt.plot(time_days, hourly_queue_data['agv_queue'], 'r-', label='AGV Queue', linewidth=2)
-    plt.plot(time_days, hourly_queue_data['swapping_queue'], 'orange', label='Swapping Queue', linewidth=2)
-    plt.plot(time_days, hourly_queue_data['charging_queue'], 'purple', label='Charging Queue', linewidth=2)
+    plt.plot(time_days, time_series['battery_queue'], 'g-', label='Battery Queue', linewidth=2)
+    plt.plot(time_days, time_series['agv_queue'], 'r-', label='AGV Queue', linewidth=2)
+    plt.plot(time_days, time_series['swapping_queue'], 'orange', label='Swapping Queue', linewidth=2)
+    plt.plot(time_days, time_series['charging_queue'], 'purple', label='Charging Queue', linewidth=2)
     plt.title('Other Queue Lengths (Excluding Container Queue)')
     plt.xlabel('Time (days)')
     plt.ylabel('Queue Length')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    
-    plt.show()
-
-# === CALL ALL OUTPUT FUNCTIONS IN ORDER ===
-print_results()
-print_shipment_statistics()
-print_delivery_performance()
-
-input("\nPress Enter to view queue plots...")
-
-# Then show plots
-plot_queue_lengths()
-
-# Print some statistics about the queues
-# print("\n=== QUEUE STATISTICS ===")
-# if hourly_queue_data['time']:
-#     print(f"Container Queue - avg: {np.mean(hourly_queue_data['container_queue']):.1f}, max: {np.max(hourly_queue_data['container_queue'])}")
-#     print(f"Battery Queue - avg: {np.mean(hourly_queue_data['battery_queue']):.1f}, max: {np.max(hourly_queue_data['battery_queue'])}")
-#     print(f"AGV Queue - avg: {np.mean(hourly_queue_data['agv_queue']):.1f}, max: {np.max(hourly_queue_data['agv_queue'])}")
-#     print(f"Swapping Queue - avg: {np.mean(hourly_queue_data['swapping_queue']):.1f}, max: {np.max(hourly_queue_data['swapping_queue'])}")
-#     print(f"Charging Queue - avg: {np.mean(hourly_queue_data['charging_queue']):.1f}, max: {np.max(hourly_queue_data['charging_queue'])}")
 
+    plt.tight_layout()
+    if save_path is not None:
+        plt.savefig(save_path, dpi=150)
+        plt.close()
+    else:
+        plt.show()
+
+# === BATCH OUTPUT ===
+def json_safe(value):
+    """value with every infinite or NaN float replaced by None, which JSON can represent"""
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def write_outputs(results, output_dir, plots=False, report=print_report, export_format=None):
+    """Write the report, KPIs, time series and optionally plots and columnar tables to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'report.txt'), 'w') as f, contextlib.redirect_stdout(f):
+        report(results)
+
+    summary = {
+        'seed': results.seed,
+        'sim_time': results.sim_time,
+        'scenario': asdict(results.scenario),
+        'kpis': results.kpis(),
+        'delivery_performance': results.delivery_performance(),
+        'soh_below_70_time': results.soh_below_70_time,
+        'statistics_start': results.statistics_start,
+        'steady_state': results.steady_state()
+    }
+    with open(os.path.join(output_dir, 'results.json'), 'w') as f:
+        json.dump(json_safe(summary), f, indent=2, allow_nan=False)
+
+    time_series = results.time_series
+    with open(os.path.join(output_dir, 'time_series.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(time_series.keys())
+        writer.writerows(zip(*(values.tolist() for values in time_series.values())))
+
+    if export_format is not None:
+        results_export.export_results(results, os.path.join(output_dir, 'tables'), fmt=export_format)
+
+    if plots:
+        plot_queue_lengths(results, save_path=os.path.join(output_dir, 'queue_lengths.png'))
+
+def main(scenario=None, report=print_report, argv=None):
+    """Command line entry point: interactive by default, headless with --output-dir"""
+    parser = argparse.ArgumentParser(description="AGV battery swapping terminal simulation")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', help="run headless and write all outputs to this directory")
+    parser.add_argument('--plots', action='store_true', help="also save queue plots in headless mode")
+    parser.add_argument('--export', choices=results_export.FORMATS,
+                        help="also write columnar tables (monitors, shipments, AGVs, batteries) in headless mode")
+    parser.add_argument('--until-steady', action='store_true',
+                        help="stop as soon as the steady-state estimates converge (at most the scenario's sim_time)")
+    parser.add_argument('--sim-days', type=float, help="simulated horizon in days instead of the scenario's sim_time")
+    parser.add_argument('--checkpoint', help="save the model state to this file every simulated month")
+    parser.add_argument('--resume', help="continue the run saved in this checkpoint file (and keep checkpointing to it)")
+    args = parser.parse_args(argv)
+
+    scenario = scenario or Scenario()
+    headless = args.output_dir is not None
+    if scenario.show_progress == headless:
+        scenario = replace(scenario, show_progress=not headless)
+    sim_time = args.sim_days * 24 * 60 * 60 if args.sim_days is not None else None
+    if sim_time is not None:
+        scenario = replace(scenario, sim_time=sim_time)
+
+    # === RUN SIMULATION ===
+    if args.resume:
+        results = resume_simulation(args.resume, sim_time=sim_time)
+    elif args.until_steady:
+        results = run_until_steady(scenario, seed=args.seed)
+    else:
+        results = run_simulation(scenario, seed=args.seed, checkpoint_path=args.checkpoint)
+
+    if headless:
+        write_outputs(results, args.output_dir, plots=args.plots, report=report, export_format=args.export)
+        return results
+
+    # === CALL ALL OUTPUT FUNCTIONS IN ORDER ===
+    report(results)
+
+    input("\nPress Enter to view queue plots...")
+
+    # Then show plots
+    plot_queue_lengths(results)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from Salaswim import SWAPPING_BATTERY_POOL, Scenario, TerminalEnvironment
+from sweep import make_scenario
+
+BRANCH_TIME = 182 * 24 * 60 * 60  # seconds, about six months
+
+# === EXAMPLE BRANCHES ===
+# Label -> sweep point (see sweep.SWEEP_PARAMETERS) applied from the branch time on
+BRANCHES = {
+    'unchanged': {},
+    'full SOC range': {'USE_SOC_WINDOW': False},
+    '+30 batteries': {'NUM_BATTERIES': SWAPPING_BATTERY_POOL + 30},
+}
+
+def run_prefix(scenario, seed, branch_time, checkpoint_path):
+    """Simulate the shared prefix and checkpoint it; returns the time the branches start
+
+    Checkpoints need a quiescent terminal, so the branches start at the first quiescent
+    moment from branch_time onwards, which is normally within a day.
+    """
+    env = TerminalEnvironment(trace=False, random_seed=seed, yieldless=False, scenario=scenario, seed=seed)
+    if not env.run_to_checkpoint(branch_time, checkpoint_path, scenario.sim_time):
+        raise ValueError("The terminal is never quiescent between branch_time and the end of the run")
+    return env.now()
+
+def run_branch(checkpoint_path, point):
+    """Continue the checkpointed prefix with point applied, in a worker; returns its Results"""
+    header = TerminalEnvironment.checkpoint_header(checkpoint_path)
+    scenario = make_scenario(point, header['scenario'])
+    env = TerminalEnvironment.restore(checkpoint_path, scenario)
+    env.run(till=scenario.sim_time)
+    return env.results(env.seed)
+
+def run_branches(branches, base=None, branch_time=BRANCH_TIME, seed=42, processes=None, checkpoint_path=None):
+    """Simulate the prefix up to branch_time once, then run every branch from it in parallel
+
+    branches maps a label to the sweep point the branch switches to, e.g.
+    {'full SOC range': {'USE_SOC_WINDOW': False}}; an empty point continues the base scenario
+    and gives exactly the results of an unbranched run. Branches can change parameters and
+    add AGVs or batteries (see TerminalEnvironment.switch_scenario).
+
+    The prefix checkpoint goes to a temporary file unless checkpoint_path is given. Returns
+    the actual branch time and {label: Results}.
+    """
+    base = replace(base or Scenario(), show_progress=False)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint_path = checkpoint_path or os.path.join(tmp_dir, 'prefix.ckpt')
+        start = run_prefix(base, seed, branch_time, checkpoint_path)
+        with ProcessPoolExecutor(max_workers=processes or min(len(branches), os.cpu_count())) as pool:
+            futures = {label: pool.submit(run_branch, checkpoint_path, point) for label, point in branches.items()}
+            return start, {label: future.result() for label, future in futures.items()}
+
+def print_branches(start, results):
+    labels = list(results)
+    print(f"\n=== WHAT-IF BRANCHES (from day {start / 86400:.1f}) ===")
+    print(f"{'KPI':<34}" + "".join(f" {label[:14]:>14}" for label in labels))
+    rows = {label: result.kpis() for label, result in results.items()}
+    for name in rows[labels[0]]:
+        print(f"{name:<34}" + "".join(f" {rows[label][name]:>14.3f}" for label in labels))
+
+if __name__ == "__main__":
+    start, results = run_branches(BRANCHES, base=Scenario(sim_time=365 * 24 * 60 * 60))
+    print_branches(start, results)
@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Salaswim import Scenario
+from replications import CONFIDENCE, confidence_interval, run_replication
+from sweep import make_scenario
+
+def paired_comparison(scenario_a, scenario_b, replications=10, base_seed=42, processes=None,
+                      confidence=CONFIDENCE):
+    """Run both scenarios with common random numbers and summarise the paired differences
+
+    Replication i runs both scenarios with seed base_seed + i. The per-purpose variate
+    streams then give both the same shipment arrivals, sizes, deadlines, crane cycles and
+    container destinations, so the difference b - a mostly reflects the configuration.
+    """
+    seeds = [base_seed + i for i in range(replications)]
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        rows = list(pool.map(run_replication, [scenario_a] * len(seeds) + [scenario_b] * len(seeds), seeds * 2))
+    rows_a, rows_b = rows[:len(seeds)], rows[len(seeds):]
+
+    summary = {}
+    for name in rows_a[0]:
+        if name == 'seed':
+            continue
+        a = np.array([row[name] for row in rows_a], dtype=float)
+        b = np.array([row[name] for row in rows_b], dtype=float)
+        difference = confidence_interval(b - a, confidence)
+
+        # How much pairing shrank the variance compared with independent runs
+        variance_ratio = ((np.nanvar(a, ddof=1) + np.nanvar(b, ddof=1)) / np.nanvar(b - a, ddof=1)
+                          if replications > 1 and np.nanvar(b - a, ddof=1) > 0 else np.nan)
+        summary[name] = {
+            'mean_a': float(np.nanmean(a)),
+            'mean_b': float(np.nanmean(b)),
+            **{f"difference_{key}": value for key, value in difference.items()},
+            'variance_ratio': variance_ratio
+        }
+    return rows_a, rows_b, summary
+
+def compare_swapping(base=None, **kwargs):
+    """Direct charging (a) against battery swapping (b)"""
+    base = base or Scenario()
+    return paired_comparison(make_scenario({'USE_SWAPPING': False}, base),
+                             make_scenario({'USE_SWAPPING': True}, base), **kwargs)
+
+def compare_soc_window(base=None, **kwargs):
+    """Full SOC range (a) against the SOC window (b)"""
+    base = base or Scenario()
+    return paired_comparison(make_scenario({'USE_SOC_WINDOW': False}, base),
+                             make_scenario({'USE_SOC_WINDOW': True}, base), **kwargs)
+
+def print_comparison(summary, label_a='A', label_b='B', confidence=CONFIDENCE):
+    print(f"\n=== PAIRED COMPARISON: {label_b} - {label_a} ({confidence:.0%} CI) ===")
+    print(f"{'KPI':<34} {label_a[:10]:>10} {label_b[:10]:>10} {'diff':>10} {'CI low':>10} {'CI high':>10} {'var red.':>9}")
+    for name, stats in summary.items():
+        print(f"{name:<34} {stats['mean_a']:>10.3f} {stats['mean_b']:>10.3f} {stats['difference_mean']:>10.3f} "
+              f"{stats['difference_ci_low']:>10.3f} {stats['difference_ci_high']:>10.3f} {stats['variance_ratio']:>8.1f}x")
+
+if __name__ == "__main__":
+    _, _, swapping = compare_swapping()
+    print_comparison(swapping, 'Direct', 'Swapping')
+
+    _, _, soc_window = compare_soc_window()
+    print_comparison(soc_window, 'Full SOC', 'SOC window')
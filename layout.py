@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+import numpy as np
+
+from road_network import road_distances
+
+SWAP_NODE = 0  # The swapping station is always node 0
+
+class TerminalLayout:
+    """Discretized terminal: swapping station, quay pickup points and a grid of yard slots
+
+    Nodes are numbered swapping station first, then the quay points, then the yard slots
+    row by row. distance[i, j] holds the driving distance in meters from node i to node j:
+    straight-line, or over the road network file given as road_network.
+    """
+    def __init__(self, swapping_station, pickup_x, pickup_ys, yard_x, yard_y, slot_spacing, road_network=None):
+        self.slot_spacing = slot_spacing
+        self.yard_x0, self.yard_y0 = yard_x[0], yard_y[0]
+        yard_xs = np.arange(yard_x[0], yard_x[1] + slot_spacing / 2, slot_spacing)
+        yard_ys = np.arange(yard_y[0], yard_y[1] + slot_spacing / 2, slot_spacing)
+        self.yard_shape = (len(yard_xs), len(yard_ys))
+
+        quay = np.array([(pickup_x, y) for y in pickup_ys], dtype=float)
+        yard = np.array([(x, y) for x in yard_xs for y in yard_ys], dtype=float)
+        self.points = np.vstack(([swapping_station], quay, yard))
+
+        self.quay_nodes = np.arange(1, 1 + len(quay))
+        self.first_yard_node = 1 + len(quay)
+        self.num_nodes = len(self.points)
+
+        if road_network is not None:
+            self.distance = road_distances(self.points, road_network)
+        else:
+            delta = self.points[:, None, :] - self.points[None, :, :]
+            self.distance = np.sqrt((delta ** 2).sum(axis=2))
+
+    def quay_node(self, index):
+        """Node of the index-th quay pickup point"""
+        return 1 + index
+
+    def yard_node(self, x, y):
+        """Node of the yard slot nearest to (x, y)"""
+        nx, ny = self.yard_shape
+        ix = min(max(int(round((x - self.yard_x0) / self.slot_spacing)), 0), nx - 1)
+        iy = min(max(int(round((y - self.yard_y0) / self.slot_spacing)), 0), ny - 1)
+        return self.first_yard_node + ix * ny + iy
+
+class TravelTables:
+    """Distance (m), travel time (s) and energy (kWh) of every leg between layout nodes"""
+    def __init__(self, layout, speed, power_consumption):
+        self.layout = layout
+        self.distance = layout.distance
+        self.time = layout.distance / speed
+        self.energy = layout.distance * (power_consumption / 1000)  # kWh/km * m / 1000
+
+@lru_cache(maxsize=4)
+def build_layout(swapping_station, pickup_x, pickup_ys, yard_x, yard_y, slot_spacing, road_network=None):
+    """Cached TerminalLayout; arguments must be hashable (tuples)"""
+    return TerminalLayout(swapping_station, pickup_x, pickup_ys, yard_x, yard_y, slot_spacing, road_network)
+
+@lru_cache(maxsize=8)
+def build_travel_tables(layout, speed, power_consumption):
+    """Cached TravelTables, so runs in one process share the matrices"""
+    return TravelTables(layout, speed, power_consumption)
@@ -0,0 +1,266 @@
+import math
+
+import numpy as np
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P² algorithm (Jain & Chlamtac, 1985)
+
+    Keeps five markers instead of the observations, so memory is constant.
+    """
+    __slots__ = ('p', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []  # Marker heights; the first five observations until initialised
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(x)
+            heights.sort()
+            return
+
+        # Find the cell containing x, stretching the extreme markers if needed, and shift
+        # the markers above it. Unrolled: this runs for every tally of a tracked monitor.
+        positions = self.positions
+        if x < heights[1]:
+            if x < heights[0]:
+                heights[0] = x
+            positions[1] += 1
+            positions[2] += 1
+            positions[3] += 1
+        elif x < heights[2]:
+            positions[2] += 1
+            positions[3] += 1
+        elif x < heights[3]:
+            positions[3] += 1
+        elif x >= heights[4]:
+            heights[4] = x
+        positions[4] += 1
+
+        # Only the middle markers move, so only their desired positions are kept up to date
+        desired, increments = self.desired, self.increments
+        desired[1] += increments[1]
+        desired[2] += increments[2]
+        desired[3] += increments[3]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - positions[i]
+            if d >= 1:
+                if positions[i + 1] - positions[i] <= 1:
+                    continue
+                step = 1
+            elif d <= -1:
+                if positions[i - 1] - positions[i] >= -1:
+                    continue
+                step = -1
+            else:
+                continue
+            height = self._parabolic(i, step)
+            if not heights[i - 1] < height < heights[i + 1]:
+                height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+            heights[i] = height
+            positions[i] += step
+
+    def _parabolic(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        heights = self.heights
+        if not heights:
+            return math.nan
+        if len(heights) < 5:
+            # Too few observations for the markers: use the exact order statistic
+            return heights[min(len(heights) - 1, int(round(self.p * (len(heights) - 1))))]
+        return heights[2]
+
+class StreamingMonitor:
+    """Constant-memory stand-in for a non level sim.Monitor
+
+    Keeps a running mean and variance (Welford), minimum and maximum, P² estimates of the
+    requested percentiles and, if bins are given as (low, high, number), a fixed-width
+    histogram. Offers the part of the sim.Monitor API the model uses.
+
+    tally() only appends to a buffer of at most BUFFER_SIZE values, which is folded into the
+    statistics with NumPy when full or when a statistic is read, so a tally costs about as
+    much as one of sim.Monitor.
+    """
+    BUFFER_SIZE = 1024
+
+    def __init__(self, name, percentiles=(5, 50, 95), bins=None):
+        self._name = name
+        self._percentiles = tuple(percentiles)
+        self._bins = bins
+        self.reset()
+
+    def reset(self):
+        self._buffer = []
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self._quantiles = {q: P2Quantile(q / 100) for q in self._percentiles}
+        self._quantile_adds = tuple(quantile.add for quantile in self._quantiles.values())
+        if self._bins is not None:
+            low, high, number = self._bins
+            self.bin_edges = np.linspace(low, high, number + 1)
+            self.bin_counts = np.zeros(number + 2, dtype=np.int64)  # Plus underflow and overflow bins
+
+    def name(self):
+        return self._name
+
+    def tally(self, x):
+        buffer = self._buffer
+        buffer.append(x)
+        if len(buffer) >= self.BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        """Fold the buffered values into the statistics"""
+        buffer = self._buffer
+        if not buffer:
+            return
+        values = np.array(buffer, dtype=float)
+
+        # Merge the batch mean and variance into the running ones (Chan et al.)
+        count = len(values)
+        batch_mean = values.mean()
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        n = self.n + count
+        delta = batch_mean - self._mean
+        self._mean += float(delta * count / n)
+        self._m2 += batch_m2 + float(delta * delta * self.n * count / n)
+        self.n = n
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+
+        for add in self._quantile_adds:
+            for x in buffer:
+                add(x)
+        if self._bins is not None:
+            self.bin_counts += np.bincount(np.searchsorted(self.bin_edges, values, side='right'),
+                                           minlength=len(self.bin_counts))
+        buffer.clear()
+
+    def number_of_entries(self):
+        return self.n + len(self._buffer)
+
+    def mean(self):
+        self._flush()
+        return self._mean if self.n > 0 else math.nan
+
+    def std(self):
+        self._flush()
+        return math.sqrt(self._m2 / self.n) if self.n > 0 else math.nan
+
+    def minimum(self):
+        self._flush()
+        return self._min if self.n > 0 else math.nan
+
+    def maximum(self):
+        self._flush()
+        return self._max if self.n > 0 else math.nan
+
+    def percentile(self, q):
+        """Estimated q-th percentile; q must be one of the percentiles given at creation"""
+        if q not in self._quantiles:
+            raise ValueError(f"Percentile {q} is not tracked by {self._name}; tracked: {self._percentiles}")
+        self._flush()
+        return self._quantiles[q].value()
+
+    def percentiles(self):
+        self._flush()
+        return {q: quantile.value() for q, quantile in self._quantiles.items()}
+
+    def histogram(self):
+        """Bin edges and counts; counts[0] and counts[-1] hold values below and above the edges"""
+        if self._bins is None:
+            raise ValueError(f"{self._name} was created without histogram bins")
+        self._flush()
+        return self.bin_edges, self.bin_counts
+
+class LevelHistogram:
+    """Constant-memory stand-in for the level sim.Monitor of an integer level, such as a queue length
+
+    Keeps the total time spent at each level rather than every change, so the time-weighted
+    mean, minimum, maximum and percentiles are exact while memory only grows with the highest
+    level reached. As in sim.Monitor, a level left at the moment it was reached (several
+    changes at one time) does not count, except for the current level. Offers the part of
+    the level sim.Monitor API the model and sim.Queue use.
+    """
+    def __init__(self, name, env, initial=0):
+        self._name = name
+        self.env = env
+        self._durations = [0.0] * (initial + 1)  # Time spent at each level, up to self._since
+        self._level = initial
+        self._since = env.now()
+
+    def reset(self):
+        """Forget the history: statistics restart from now, at the current level"""
+        self._durations = [0.0] * (self._level + 1)
+        self._since = self.env.now()
+
+    def name(self):
+        return self._name
+
+    def tally(self, level):
+        now = self.env.now()
+        durations = self._durations
+        durations[self._level] += now - self._since
+        if level >= len(durations):
+            durations.extend([0.0] * (level + 1 - len(durations)))
+        self._level = level
+        self._since = now
+
+    def durations(self):
+        """Time spent at each level up to now, indexed by level"""
+        durations = np.array(self._durations)
+        durations[self._level] += self.env.now() - self._since
+        return durations
+
+    def mean(self):
+        durations = self.durations()
+        total = durations.sum()
+        return float(np.arange(len(durations)) @ durations / total) if total > 0 else math.nan
+
+    def _visited(self):
+        """Levels held for some time, and the current level"""
+        visited = self.durations() > 0
+        visited[self._level] = True
+        return np.flatnonzero(visited)
+
+    def minimum(self):
+        return int(self._visited()[0])
+
+    def maximum(self):
+        return int(self._visited()[-1])
+
+    def percentile(self, q):
+        """q-th percentile of the time-weighted level, as sim.Monitor computes it for level monitors
+
+        That is the lowest level at or below which the level spent q% of the time, or the
+        midpoint with the next level visited when that fraction is exactly q%.
+        """
+        q = max(0, min(q, 100))
+        if q == 0:
+            return self.minimum()
+        if q == 100:
+            return self.maximum()
+        durations = self.durations()
+        total = durations.sum()
+        if total == 0:
+            return math.nan
+        cumulative = np.cumsum(durations) / total
+        level = int(np.searchsorted(cumulative, q / 100, side='left'))
+        if cumulative[level] != q / 100:
+            return level
+        above = np.flatnonzero(durations[level + 1:])
+        return (level + (level + 1 + int(above[0]))) / 2 if len(above) else level
@@ -1,35 +1,37 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from timeseries import TimeSeriesRecorder
+
+QUEUE_SERIES = ['battery_queue', 'container_queue', 'agv_queue', 'swapping_queue', 'charging_queue']
+
 class QueuePlotter:
-    def __init__(self):
-        self.hourly_queue_data = {
-            'time': [],
-            'battery_queue': [],
-            'container_queue': [],
-            'agv_queue': [],
-            'swapping_queue': [],
-            'charging_queue': []
-        }
+    def __init__(self, time_series=None):
+        """Plot a TimeSeriesRecorder (or Results.time_series) directly, or record into a new one"""
+        if time_series is None:
+            time_series = TimeSeriesRecorder()
+            for queue_name in QUEUE_SERIES:
+                time_series.register(queue_name, dtype=np.int32)
+        self.hourly_queue_data = time_series
     
     def record_queue_lengths(self, current_time_hours, battery_queue, container_queue, 
                            agv_queue, swapping_queue, charging_queue):
         """Record queue lengths at a specific time point"""
-        self.hourly_queue_data['time'].append(current_time_hours)
-        self.hourly_queue_data['battery_queue'].append(battery_queue)
-        self.hourly_queue_data['container_queue'].append(container_queue)
-        self.hourly_queue_data['agv_queue'].append(agv_queue)
-        self.hourly_queue_data['swapping_queue'].append(swapping_queue)
-        self.hourly_queue_data['charging_queue'].append(charging_queue)
+        self.hourly_queue_data.record(current_time_hours, battery_queue=battery_queue,
+                                      container_queue=container_queue, agv_queue=agv_queue,
+                                      swapping_queue=swapping_queue, charging_queue=charging_queue)
+    
+    def has_data(self):
+        return len(self.hourly_queue_data['time']) > 0
     
     def plot_queue_lengths(self):
         """Create comprehensive plots of all queue lengths over time"""
-        if not self.hourly_queue_data['time']:
+        if not self.has_data():
             print("No queue data available for plotting")
             return
             
         # Convert time to days for better readability
-        time_days = np.array(self.hourly_queue_data['time']) / 24
+        time_days = np.asarray(self.hourly_queue_data['time']) / 24
         
         # Create main subplot figure
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
@@ -118,7 +120,7 @@ class QueuePlotter:
     def print_queue_statistics(self):
         """Print statistical summary of queue lengths"""
         print("\n=== QUEUE STATISTICS ===")
-        if self.hourly_queue_data['time']:
+        if self.has_data():
             print(f"Container Queue - avg: {np.mean(self.hourly_queue_data['container_queue']):.1f}, max: {np.max(self.hourly_queue_data['container_queue'])}")
             print(f"Battery Queue - avg: {np.mean(self.hourly_queue_data['battery_queue']):.1f}, max: {np.max(self.hourly_queue_data['battery_queue'])}")
             print(f"AGV Queue - avg: {np.mean(self.hourly_queue_data['agv_queue']):.1f}, max: {np.max(self.hourly_queue_data['agv_queue'])}")
@@ -129,11 +131,11 @@ class QueuePlotter:
     
     def plot_individual_queue(self, queue_name, color='blue', save_path=None):
         """Plot a single queue over time"""
-        if queue_name not in self.hourly_queue_data or not self.hourly_queue_data['time']:
+        if queue_name not in self.hourly_queue_data or not self.has_data():
             print(f"No data available for {queue_name}")
             return
             
-        time_days = np.array(self.hourly_queue_data['time']) / 24
+        time_days = np.asarray(self.hourly_queue_data['time']) / 24
         
         plt.figure(figsize=(12, 6))
         plt.plot(time_days, self.hourly_queue_data[queue_name], color=color, linewidth=2)
@@ -151,22 +153,22 @@ class QueuePlotter:
         """Export queue data to CSV file"""
         import pandas as pd
         
-        if not self.hourly_queue_data['time']:
+        if not self.has_data():
             print("No data to export")
             return
             
-        df = pd.DataFrame(self.hourly_queue_data)
+        df = pd.DataFrame(dict(self.hourly_queue_data))
         df['time_days'] = df['time'] / 24
         df.to_csv(filename, index=False)
         print(f"Queue data exported to {filename}")
     
     def get_data_summary(self):
         """Return a dictionary with summary statistics"""
-        if not self.hourly_queue_data['time']:
+        if not self.has_data():
             return None
             
         summary = {}
-        for queue_name in ['battery_queue', 'container_queue', 'agv_queue', 'swapping_queue', 'charging_queue']:
+        for queue_name in QUEUE_SERIES:
             data = self.hourly_queue_data[queue_name]
             summary[queue_name] = {
                 'mean': np.mean(data),
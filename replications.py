@@ -0,0 +1,96 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import t
+
+from Salaswim import Scenario, run_simulation
+
+CONFIDENCE = 0.95
+
+def run_replication(scenario, seed):
+    """Run one replication in a worker and return its KPI row"""
+    results = run_simulation(scenario, seed=seed)
+    return {'seed': seed, **results.kpis()}
+
+def confidence_interval(values, confidence=CONFIDENCE):
+    """Mean, standard deviation and Student-t CI of independent replication values"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]  # e.g. no shipment completed in a replication
+    n = len(values)
+    mean = values.mean() if n > 0 else math.nan
+    std = values.std(ddof=1) if n > 1 else math.nan
+    half_width = t.ppf((1 + confidence) / 2, n - 1) * std / math.sqrt(n) if n > 1 else math.inf
+    return {
+        'n': n,
+        'mean': mean,
+        'std': std,
+        'half_width': half_width,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width
+    }
+
+def summarize(rows, confidence=CONFIDENCE):
+    """Per-KPI mean, std and CI over the replication rows"""
+    kpi_names = [name for name in rows[0] if name != 'seed']
+    return {name: confidence_interval([row[name] for row in rows], confidence)
+            for name in kpi_names}
+
+def run_replications(scenario=None, replications=10, base_seed=42, processes=None, confidence=CONFIDENCE):
+    """Run replications with seeds base_seed, base_seed + 1, ... in parallel
+
+    Returns the per-replication rows (in seed order) and their summary.
+    """
+    scenario = scenario or Scenario()
+    seeds = [base_seed + i for i in range(replications)]
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        rows = list(pool.map(run_replication, [scenario] * len(seeds), seeds))
+    return rows, summarize(rows, confidence)
+
+def run_until_precision(scenario=None, targets=None, relative=False, initial_replications=5,
+                        max_replications=100, base_seed=42, processes=None, confidence=CONFIDENCE):
+    """Add replications until every targeted KPI's CI half-width is small enough
+
+    targets maps KPI name to the wanted half-width, e.g. {'on_time_pct': 2.0}; with relative=True
+    the half-width is taken as a fraction of the mean instead. Replications are added one
+    pool-width at a time so no core sits idle, and stop at max_replications.
+    """
+    scenario = scenario or Scenario()
+    targets = targets or {'on_time_pct': 2.0}
+    processes = processes or os.cpu_count()
+
+    def precise_enough(summary):
+        for name, target in targets.items():
+            half_width = summary[name]['half_width']
+            if relative:
+                half_width = half_width / abs(summary[name]['mean']) if summary[name]['mean'] else math.inf
+            if not half_width <= target:  # Also catches NaN
+                return False
+        return True
+
+    rows = []
+    next_seed = base_seed
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        batch = initial_replications
+        while True:
+            batch = min(batch, max_replications - len(rows))
+            seeds = list(range(next_seed, next_seed + batch))
+            next_seed += batch
+            rows.extend(pool.map(run_replication, [scenario] * len(seeds), seeds))
+
+            summary = summarize(rows, confidence)
+            if precise_enough(summary) or len(rows) >= max_replications:
+                return rows, summary
+            batch = processes
+
+def print_summary(summary, confidence=CONFIDENCE):
+    print(f"\n=== REPLICATION SUMMARY ({confidence:.0%} CI) ===")
+    print(f"{'KPI':<34} {'n':>4} {'mean':>10} {'std':>10} {'CI low':>10} {'CI high':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<34} {stats['n']:>4} {stats['mean']:>10.3f} {stats['std']:>10.3f} "
+              f"{stats['ci_low']:>10.3f} {stats['ci_high']:>10.3f}")
+
+if __name__ == "__main__":
+    rows, summary = run_until_precision(Scenario(), targets={'on_time_pct': 2.0})
+    print_summary(summary)
@@ -0,0 +1,220 @@
+import glob
+import json
+import os
+from dataclasses import asdict
+
+import numpy as np
+
+# Bump when a column is added, removed or changes meaning
+SCHEMA_VERSION = 3
+
+FORMATS = ('npz', 'parquet')
+
+# Fixed columns per table; every table also starts with run_id and seed
+SHIPMENT_COLUMNS = [
+    ('shipment_id', np.int64),
+    ('status', str),  # 'completed' or 'active'
+    ('size', np.int64),
+    ('containers_remaining', np.int64),
+    ('arrival_time', np.float64),
+    ('unloading_completion_time', np.float64),
+    ('unloading_duration', np.float64),
+    ('completion_time', np.float64),
+    ('delivery_time', np.float64),
+    ('deadline_minutes', np.float64),
+    ('deadline_time', np.float64),
+    ('is_on_time', np.float64),  # 1.0 / 0.0, NaN while active
+]
+
+AGV_COLUMNS = [
+    ('agv_id', str),
+    ('idle_time', np.float64),
+    ('running_time', np.float64),
+    ('swapping_time', np.float64),
+    ('distance', np.float64),
+    ('swaps', np.int64),
+    ('containers', np.int64),
+]
+
+BATTERY_COLUMNS = [
+    ('battery_id', str),
+    ('charge_cycles', np.int64),
+    ('usage_count', np.int64),
+    ('total_energy_delivered', np.float64),
+    ('soc', np.float64),
+    ('soh', np.float64),
+]
+
+# cycles_in_range in long form, so the schema does not depend on the degradation profile
+BATTERY_CYCLE_COLUMNS = [
+    ('battery_id', str),
+    ('soc_range', str),
+    ('cycles', np.int64),
+]
+
+MONITOR_COLUMNS = [
+    ('monitor', str),
+    ('statistic', str),
+    ('value', np.float64),
+]
+
+# Scenario parameters in the runs table, each as a scenario_<name> column
+SCENARIO_COLUMNS = [
+    ('use_swapping', np.bool_),
+    ('use_soc_window', np.bool_),
+    ('use_container_records', np.bool_),
+    ('use_streaming_monitors', np.bool_),
+    ('fast_forward', np.bool_),
+    ('num_agvs', np.int64),
+    ('num_batteries', np.int64),
+    ('charging_rate', np.float64),
+    ('battery_capacity', np.float64),
+    ('agv_speed', np.float64),
+    ('swapping_time', np.float64),
+    ('loading_time', np.float64),
+    ('unloading_time', np.float64),
+    ('power_consumption', np.float64),
+    ('idle_power_consumption', np.float64),
+    ('yard_slot_spacing', np.float64),
+    ('road_network', str),  # '' for the built-in grid
+    ('sim_time', np.float64),
+    ('sample_interval', np.float64),
+    ('soc_min', np.float64),
+    ('soc_max', np.float64),
+    ('num_cranes', np.int64),
+    ('crane_cycle_mean', np.float64),
+    ('crane_cycle_std', np.float64),
+    ('crane_cycle_min', np.float64),
+    ('crane_cycle_max', np.float64),
+    ('degradation_profile', str),  # JSON
+    ('show_progress', np.bool_),
+]
+
+# The headline KPIs follow these columns, with the dtypes of Results.kpis()
+RUN_COLUMNS = [
+    ('schema_version', np.int64),
+    ('sim_time', np.float64),
+    ('statistics_start', np.float64),  # Warm-up end for run_until_steady, else 0
+    *((f"scenario_{name}", dtype) for name, dtype in SCENARIO_COLUMNS),
+]
+
+def _missing_value(value, dtype):
+    """value, with None as '' in string columns and NaN in the others"""
+    if value is not None:
+        return value
+    return '' if dtype is str else np.nan
+
+def _table(run_id, seed, columns, rows):
+    """Column arrays with the declared dtypes, prefixed by the run key columns"""
+    table = {
+        'run_id': np.full(len(rows), run_id, dtype=np.int64),
+        'seed': np.full(len(rows), seed, dtype=np.int64),
+    }
+    for name, dtype in columns:
+        values = [_missing_value(row[name], dtype) for row in rows]
+        table[name] = np.array(values, dtype=dtype) if values else np.empty(0, dtype=dtype)
+    return table
+
+def shipment_table(results, run_id=0):
+    rows = []
+    for status, shipments in (('completed', results.completed_shipments), ('active', results.active_shipments)):
+        for shipment in shipments:
+            rows.append({
+                **shipment,
+                'shipment_id': shipment['id'],
+                'status': status
+            })
+    return _table(run_id, results.seed, SHIPMENT_COLUMNS, rows)
+
+def agv_table(results, run_id=0):
+    return _table(run_id, results.seed, AGV_COLUMNS, results.agv_stats)
+
+def battery_table(results, run_id=0):
+    return _table(run_id, results.seed, BATTERY_COLUMNS, results.battery_stats)
+
+def battery_cycle_table(results, run_id=0):
+    rows = [{'battery_id': battery['battery_id'], 'soc_range': soc_range, 'cycles': cycles}
+            for battery in results.battery_stats
+            for soc_range, cycles in battery['cycles_in_range'].items()]
+    return _table(run_id, results.seed, BATTERY_CYCLE_COLUMNS, rows)
+
+def monitor_table(results, run_id=0):
+    """Monitor summaries in long form: averages, per-trip percentiles and queue statistics"""
+    rows = [{'monitor': 'kpi', 'statistic': name, 'value': value} for name, value in results.kpis().items()]
+    for monitor, percentiles in results.monitor_percentiles.items():
+        rows.extend({'monitor': monitor, 'statistic': f"p{q}", 'value': value} for q, value in percentiles.items())
+    for queue, stats in results.queue_stats.items():
+        rows.extend({'monitor': queue, 'statistic': statistic, 'value': value} for statistic, value in stats.items())
+    return _table(run_id, results.seed, MONITOR_COLUMNS, rows)
+
+def time_series_table(results, run_id=0):
+    time_series = results.time_series
+    n = len(time_series['time'])
+    table = {
+        'run_id': np.full(n, run_id, dtype=np.int64),
+        'seed': np.full(n, results.seed, dtype=np.int64),
+    }
+    table.update({name: np.asarray(values) for name, values in time_series.items()})
+    return table
+
+def run_table(results, run_id=0):
+    """One row with the scenario parameters and headline KPIs"""
+    scenario = asdict(results.scenario)
+    scenario['degradation_profile'] = json.dumps(scenario['degradation_profile'])
+    row = {
+        'schema_version': SCHEMA_VERSION,
+        'sim_time': results.sim_time,
+        'statistics_start': results.statistics_start,
+        **{f"scenario_{name}": value for name, value in scenario.items()},
+        **results.kpis()
+    }
+    table = _table(run_id, results.seed, RUN_COLUMNS, [row])
+    table.update({name: np.array([value]) for name, value in row.items() if name not in table})
+    return table
+
+TABLES = {
+    'runs': run_table,
+    'shipments': shipment_table,
+    'agvs': agv_table,
+    'batteries': battery_table,
+    'battery_cycles': battery_cycle_table,
+    'monitors': monitor_table,
+    'time_series': time_series_table,
+}
+
+def export_results(results, output_dir, fmt='npz', run_id=0):
+    """Write every table of one run to output_dir as <table>.npz or <table>.parquet"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; use one of {FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = []
+    for name, build in TABLES.items():
+        table = build(results, run_id)
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        if fmt == 'npz':
+            np.savez_compressed(path, **table)
+        else:
+            import pandas as pd  # Parquet also needs pyarrow installed
+            pd.DataFrame(table).to_parquet(path, compression='zstd', index=False)
+        paths.append(path)
+    return paths
+
+def read_table(path):
+    """Load one exported table file as a pandas DataFrame"""
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+def load_table(root, name):
+    """Concatenate table name over all runs exported anywhere below root"""
+    import pandas as pd
+
+    paths = sorted(glob.glob(os.path.join(root, '**', f"{name}.npz"), recursive=True) +
+                   glob.glob(os.path.join(root, '**', f"{name}.parquet"), recursive=True))
+    if not paths:
+        raise FileNotFoundError(f"No exported {name!r} tables below {root}")
+    return pd.concat([read_table(path) for path in paths], ignore_index=True)
@@ -0,0 +1,96 @@
+"""Terminal road network with all-pairs shortest-path distances cached on disk
+
+A road network file is JSON with node coordinates in meters and undirected edges; an
+edge length defaults to the straight-line distance between its end nodes:
+
+    {
+        "nodes": {"gate": [0, 0], "quay_north": [340, 1490], ...},
+        "edges": [["gate", "quay_north"], ["gate", "yard_a", 612.5], ...]
+    }
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR_NAME = '.road_cache'  # Created next to the road network file
+
+class RoadNetwork:
+    def __init__(self, node_ids, coords, edges):
+        self.node_ids = list(node_ids)
+        self.coords = np.asarray(coords, dtype=float)
+        self.edges = edges  # (from index, to index, length in meters)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        node_ids = sorted(data['nodes'])
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        coords = [data['nodes'][node_id] for node_id in node_ids]
+
+        edges = []
+        for edge in data['edges']:
+            u, v = index[edge[0]], index[edge[1]]
+            if len(edge) > 2:
+                length = float(edge[2])
+            else:
+                length = float(np.hypot(*(np.asarray(coords[u], float) - np.asarray(coords[v], float))))
+            edges.append((u, v, length))
+        return cls(node_ids, coords, edges)
+
+    def graph_hash(self):
+        """Content hash of nodes and edges, so reordering the file does not invalidate the cache"""
+        canonical = json.dumps({
+            'nodes': [[node_id, *map(float, xy)] for node_id, xy in zip(self.node_ids, self.coords)],
+            'edges': sorted([min(u, v), max(u, v), round(length, 6)] for u, v, length in self.edges)
+        })
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def shortest_paths(self):
+        """All-pairs shortest-path distances between the road nodes (inf if unreachable)"""
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import shortest_path
+
+        n = len(self.node_ids)
+        u, v, length = zip(*self.edges) if self.edges else ((), (), ())
+        graph = coo_matrix((length, (u, v)), shape=(n, n)).tocsr()
+        return shortest_path(graph, method='D', directed=False)
+
+    def cached_shortest_paths(self, cache_dir):
+        """shortest_paths(), read from cache_dir/<graph hash>.npz when computed before"""
+        path = os.path.join(cache_dir, f"{self.graph_hash()}.npz")
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return data['distance']
+
+        distance = self.shortest_paths()
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"  # Parallel workers may race to write the same entry
+        np.savez_compressed(tmp_path, distance=distance)
+        os.replace(tmp_path, path)
+        return distance
+
+    def point_distances(self, points, shortest):
+        """Driving distances between points, entering and leaving the network at the nearest road node
+
+        Each point drives straight to its nearest road node, follows the shortest path, and
+        drives straight from the last road node to the destination.
+        """
+        points = np.asarray(points, dtype=float)
+        offsets = np.sqrt(((points[:, None, :] - self.coords[None, :, :]) ** 2).sum(axis=2))
+        nearest = offsets.argmin(axis=1)
+        access = offsets[np.arange(len(points)), nearest]
+
+        distance = access[:, None] + shortest[np.ix_(nearest, nearest)] + access[None, :]
+        np.fill_diagonal(distance, 0)
+        if np.isinf(distance).any():
+            raise ValueError("Road network does not connect all terminal locations")
+        return distance
+
+def road_distances(points, network_path):
+    """Driving distance matrix between points over the road network in network_path"""
+    network = RoadNetwork.from_file(network_path)
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(network_path)), CACHE_DIR_NAME)
+    return network.point_distances(points, network.cached_shortest_paths(cache_dir))
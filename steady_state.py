@@ -0,0 +1,162 @@
+"""Warm-up detection and steady-state estimates from a run's time series
+
+Every run starts from an artificial state (all batteries full, all AGVs at the swapping
+station), so the first part of a run is a transient. mser() finds where it ends; the
+steady-state estimates use only the samples after that point, with batch-means
+confidence intervals since consecutive samples of one run are correlated.
+"""
+import math
+
+import numpy as np
+from scipy.stats import t
+
+CONFIDENCE = 0.95
+MSER_BATCH_SIZE = 5  # MSER-5: truncation point searched over means of 5 consecutive samples
+MIN_BATCHES = 10  # Fewest batches a batch-means confidence interval is based on
+MIN_SHIPMENTS = 30  # Fewest shipments after the warm-up before the on-time rate can converge
+
+# Series with steady-state estimates; container_delivery_time is derived per sample interval,
+# on_time_pct from the completed shipments
+STEADY_STATE_SERIES = ('container_queue', 'battery_queue', 'agv_queue', 'fleet_soc', 'container_delivery_time',
+                       'on_time_pct')
+# Series that set the warm-up and must converge. The container queue is empty at almost every
+# sample: MSER would only pick out its rare bursts, and no relative precision is reachable for it.
+WARMUP_SERIES = ('battery_queue', 'agv_queue', 'fleet_soc', 'container_delivery_time')
+# Series that must converge before a run may stop: the warm-up series and the on-time rate
+CONVERGENCE_SERIES = WARMUP_SERIES + ('on_time_pct',)
+
+def mser(values, batch_size=MSER_BATCH_SIZE):
+    """Number of leading values to discard as warm-up, by the MSER rule
+
+    The truncation point d minimizes sum((x_i - mean(x[d:]))^2) / (n - d)^2 over the batch
+    means. Only the first half of the series is searched: near the end a few batches that
+    happen to vary little would otherwise win. Returns None for fewer than 4 batches.
+    """
+    values = np.asarray(values, dtype=float)
+    k = len(values) // batch_size
+    if k < 4:
+        return None
+    batches = values[:k * batch_size].reshape(k, batch_size).mean(axis=1)
+    batches = batches - batches.mean()  # Centered, so the suffix sums below stay accurate
+
+    # Sum and sum of squares of batches[d:] for every d
+    suffix_sum = np.cumsum(batches[::-1])[::-1]
+    suffix_squares = np.cumsum((batches ** 2)[::-1])[::-1]
+    remaining = np.arange(k, 0, -1)
+    statistic = (suffix_squares - suffix_sum ** 2 / remaining) / remaining ** 2
+
+    return int(np.argmin(statistic[:k // 2 + 1])) * batch_size
+
+def lag1_correlation(values):
+    """Lag-1 autocorrelation of values (0 for a constant series)"""
+    deviations = values - values.mean()
+    denominator = (deviations ** 2).sum()
+    return float((deviations[:-1] * deviations[1:]).sum() / denominator) if denominator > 0 else 0.0
+
+def batch_means(values, min_batches=MIN_BATCHES, confidence=CONFIDENCE):
+    """Mean and Student-t CI of correlated values from one run, by batch means
+
+    The batch size starts at 1 and doubles until the lag-1 autocorrelation of the batch
+    means is no longer significant at the given confidence, so the batch means can be
+    treated as independent. If that needs fewer than min_batches batches, the CI uses
+    min_batches batches and is flagged 'correlated': too few independent batches to trust
+    it; run longer or use replications instead. With fewer than min_batches values there is
+    no CI and 'correlated' is None. Values that do not fill a whole batch are dropped from
+    the start, nearest the warm-up.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n < min_batches:
+        mean = values.mean() if n else math.nan
+        return {'n': n, 'batch_size': 0, 'num_batches': 0, 'mean': mean, 'half_width': math.inf,
+                'ci_low': -math.inf, 'ci_high': math.inf, 'lag1': math.nan, 'correlated': None}
+
+    z = t.ppf((1 + confidence) / 2, math.inf)
+    batch_size = 1
+    while True:
+        num_batches = n // batch_size
+        batches = values[n - batch_size * num_batches:].reshape(num_batches, batch_size).mean(axis=1)
+        lag1 = lag1_correlation(batches)
+        correlated = bool(abs(lag1) > z / math.sqrt(num_batches))
+        if not correlated or n // (2 * batch_size) < min_batches:
+            break
+        batch_size *= 2
+
+    mean = batches.mean()
+    half_width = t.ppf((1 + confidence) / 2, num_batches - 1) * batches.std(ddof=1) / math.sqrt(num_batches)
+    return {
+        'n': n,
+        'batch_size': batch_size,
+        'num_batches': num_batches,
+        'mean': mean,
+        'half_width': half_width,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+        'lag1': lag1,
+        'correlated': correlated
+    }
+
+def observations(time_series, name, completed_shipments=()):
+    """Sample times (hours) and values of one steady-state series
+
+    container_delivery_time is the mean delivery time (minutes) of the containers delivered
+    in each sample interval; intervals without deliveries are left out. on_time_pct has one
+    value per completed shipment, 100 if it was on time and 0 if not, at its completion time.
+    """
+    if name == 'on_time_pct':
+        times = np.array([s['completion_time'] / 3600 for s in completed_shipments], dtype=float)
+        return times, np.array([100 * s['is_on_time'] for s in completed_shipments], dtype=float)
+    if name == 'container_delivery_time':
+        delivered = np.diff(time_series['containers_delivered'])
+        minutes = np.diff(time_series['delivery_minutes_total'])
+        has_deliveries = delivered > 0
+        return time_series['time'][1:][has_deliveries], minutes[has_deliveries] / delivered[has_deliveries]
+    return time_series['time'], np.asarray(time_series[name], dtype=float)
+
+def steady_state_summary(time_series, completed_shipments=(), series=STEADY_STATE_SERIES,
+                         min_batches=MIN_BATCHES, confidence=CONFIDENCE):
+    """Warm-up end and truncated batch-means estimates of the steady-state series
+
+    The warm-up ends at the latest MSER truncation point over the WARMUP_SERIES, so all
+    estimates use the same steady-state period. If a series is too short for MSER,
+    warmup_hours is None and the estimates cover the whole run.
+    """
+    observed = {name: observations(time_series, name, completed_shipments) for name in series}
+
+    warmup_hours = 0.0
+    for name in WARMUP_SERIES:
+        times, values = observed[name] if name in observed else observations(time_series, name)
+        d = mser(values)
+        if d is None:
+            warmup_hours = None
+            break
+        if d > 0:
+            warmup_hours = max(warmup_hours, float(times[d]))
+
+    estimates = {}
+    for name, (times, values) in observed.items():
+        if warmup_hours is not None:
+            values = values[times >= warmup_hours]
+        estimates[name] = batch_means(values, min_batches, confidence)
+    return {'warmup_hours': warmup_hours, 'confidence': confidence, 'series': estimates}
+
+def converged(summary, relative_precision, series=CONVERGENCE_SERIES, min_shipments=MIN_SHIPMENTS):
+    """Whether the warm-up was detected and each series has a trusted CI within relative_precision of its mean
+
+    A series without a CI (too few values) has not converged. The on-time rate also needs
+    min_shipments shipments after the warm-up: it is 0 or 100 per shipment, so a short run of
+    on-time shipments would give a CI of zero width.
+    """
+    if summary['warmup_hours'] is None:
+        return False
+    if 'on_time_pct' in series and summary['series']['on_time_pct']['n'] < min_shipments:
+        return False
+    for name in series:
+        stats = summary['series'][name]
+        if stats['correlated'] is not False:  # None without a CI, True if it cannot be trusted
+            return False
+        if stats['half_width'] == 0:
+            continue
+        if not stats['half_width'] <= relative_precision * abs(stats['mean']):  # Also catches NaN
+            return False
+    return True
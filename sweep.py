@@ -0,0 +1,105 @@
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+import results_export
+from Salaswim import Scenario, run_simulation
+
+# Grid keys and the Scenario field each one sets
+SWEEP_PARAMETERS = {
+    'NUM_AGVS': 'num_agvs',
+    'NUM_BATTERIES': 'num_batteries',
+    'USE_SWAPPING': 'use_swapping',
+    'USE_SOC_WINDOW': 'use_soc_window',
+    'CHARGING_RATE': 'charging_rate',
+    'SWAPPING_TIME': 'swapping_time',
+    'AGV_SPEED': 'agv_speed',
+}
+
+# === EXAMPLE GRID ===
+GRID = {
+    'NUM_AGVS': [60, 72, 84],
+    'USE_SWAPPING': [False, True],
+    'USE_SOC_WINDOW': [False, True],
+}
+
+def expand_grid(grid):
+    """Every combination of the grid values, as a list of {parameter: value} dicts"""
+    unknown = set(grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def make_scenario(point, base=None):
+    """Scenario for one grid point; parameters not in the point come from base"""
+    base = base or Scenario()
+    overrides = {SWEEP_PARAMETERS[name]: value for name, value in point.items()}
+
+    # Scenario resolved the derived fields for the base, so replace() would carry them over.
+    # Those still at their derived default follow the point unless it sets them itself; values
+    # the base set explicitly, such as a larger battery pool, are kept.
+    for name, value in base.derived_defaults().items():
+        if name not in overrides and getattr(base, name) == value:
+            overrides[name] = None
+    return replace(base, show_progress=False, **overrides)
+
+def run_point(run_id, point, base, seed, export_dir=None, export_format='npz'):
+    """Run one grid point in a worker and return its results table row
+
+    With export_dir set, the worker also writes the run's columnar tables to export_dir/run_<id>.
+    """
+    scenario = make_scenario(point, base)
+    results = run_simulation(scenario, seed=seed)
+    if export_dir is not None:
+        results_export.export_results(results, os.path.join(export_dir, f"run_{run_id:04d}"),
+                                      fmt=export_format, run_id=run_id)
+    return {'run_id': run_id, 'seed': seed, **point, **results.kpis()}
+
+def iter_sweep(grid, base=None, seed=42, processes=None, export_dir=None, export_format='npz'):
+    """Run all grid points over a process pool, yielding each row as its run finishes"""
+    points = expand_grid(grid)
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        futures = [pool.submit(run_point, run_id, point, base, seed, export_dir, export_format)
+                   for run_id, point in enumerate(points)]
+        for future in as_completed(futures):
+            yield future.result()
+
+def run_sweep(grid, base=None, seed=42, processes=None, output_csv=None, verbose=True,
+              export_dir=None, export_format='npz'):
+    """Run the sweep and collect the rows into one table, sorted by run id
+
+    With output_csv set, every row is appended to the file as soon as its run finishes. With
+    export_dir set, each run's full tables are exported there too; see results_export.load_table.
+    """
+    import pandas as pd
+
+    total = len(expand_grid(grid))
+    rows = []
+    writer = None
+    csv_file = open(output_csv, 'w', newline='') if output_csv else None
+    try:
+        for row in iter_sweep(grid, base=base, seed=seed, processes=processes,
+                              export_dir=export_dir, export_format=export_format):
+            rows.append(row)
+            if csv_file is not None:
+                if writer is None:
+                    writer = csv.DictWriter(csv_file, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+                csv_file.flush()
+            if verbose:
+                point = ', '.join(f"{name}={row[name]}" for name in grid)
+                print(f"[{len(rows)}/{total}] {point}: on-time {row['on_time_pct']:.1f}%, "
+                      f"SOH {row['avg_battery_soh']:.2f}%, container queue {row['avg_container_queue']:.2f}")
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+
+    return pd.DataFrame(rows).sort_values('run_id').reset_index(drop=True)
+
+if __name__ == "__main__":
+    table = run_sweep(GRID, output_csv='sweep_results.csv')
+    print(table.to_string(index=False))
@@ -0,0 +1,86 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+class TimeSeriesRecorder(Mapping):
+    """Fixed-interval time series stored in preallocated NumPy arrays
+
+    Series are registered by name, optionally with a zero-argument probe that sample()
+    calls to read the current value. The recorder reads like the old dict of lists:
+    recorder['time'] gives the sample times in hours and recorder[name] the values, both as
+    array views of the samples taken so far.
+    """
+    def __init__(self, horizon=None, interval=3600, capacity=None):
+        self.interval = interval
+        if capacity is None:
+            # One sample per interval plus the samples at t=0 and at the horizon itself
+            capacity = int(horizon // interval) + 2 if horizon is not None else 1024
+        self.count = 0
+        self._time = np.empty(capacity)
+        self._series = {}  # name -> values array
+        self._probes = {}  # name -> probe, for series read by sample()
+
+    def register(self, name, probe=None, dtype=np.float64):
+        """Add a series; values come from probe() in sample() or are passed to record()"""
+        if name == 'time' or name in self._series:
+            raise ValueError(f"Series {name!r} is already registered")
+        if self.count > 0:
+            raise ValueError("Series must be registered before the first sample")
+        self._series[name] = np.empty(len(self._time), dtype=dtype)
+        if probe is not None:
+            self._probes[name] = probe
+
+    def _grow(self):
+        capacity = 2 * len(self._time)
+        self._time = np.resize(self._time, capacity)
+        for name, values in self._series.items():
+            self._series[name] = np.resize(values, capacity)
+
+    def record(self, time_hours, **values):
+        """Store one sample at time_hours; values are given per series name"""
+        if self.count == len(self._time):
+            self._grow()
+        i = self.count
+        self._time[i] = time_hours
+        for name, value in values.items():
+            self._series[name][i] = value
+        self.count = i + 1
+
+    def sample(self, now):
+        """Store one sample at simulation time now (seconds), reading every probe"""
+        if self.count == len(self._time):
+            self._grow()
+        i = self.count
+        self._time[i] = now / 3600
+        for name, probe in self._probes.items():
+            self._series[name][i] = probe()
+        self.count = i + 1
+
+    def repeat_last(self, times):
+        """Store samples at times (seconds), all with the values of the last sample"""
+        count = len(times)
+        if count == 0:
+            return
+        while self.count + count > len(self._time):
+            self._grow()
+        i, j = self.count, self.count + count
+        self._time[i:j] = np.asarray(times) / 3600
+        for values in self._series.values():
+            values[i:j] = values[i - 1]
+        self.count = j
+
+    def __getitem__(self, name):
+        if name == 'time':
+            return self._time[:self.count]
+        return self._series[name][:self.count]
+
+    def __iter__(self):
+        yield 'time'
+        yield from self._series
+
+    def __len__(self):
+        return len(self._series) + 1
+
+    def to_dict(self):
+        """Compact copies of all series, e.g. to hand over in a Results object"""
+        return {name: self[name].copy() for name in self}
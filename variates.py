@@ -0,0 +1,60 @@
+import zlib
+
+import numpy as np
+
+VARIATE_BLOCK_SIZE = 4096  # Variates pre-drawn per refill of a stream's buffer
+
+class VariateStream:
+    """Buffered draws from one purpose's NumPy Generator; call the stream for the next value"""
+    __slots__ = ('name', 'generator', '_distribution', '_params', '_block_size', '_buffer', '_index')
+
+    def __init__(self, name, generator, distribution, params, block_size):
+        self.name = name
+        self.generator = generator
+        self._distribution = distribution
+        self._params = params
+        self._block_size = block_size
+        self._buffer = []
+        self._index = 0
+
+    def __call__(self):
+        if self._index == len(self._buffer):
+            # tolist() once per block makes every draw a plain Python float
+            draw = getattr(self.generator, self._distribution)
+            self._buffer = draw(*self._params, self._block_size).tolist()
+            self._index = 0
+        value = self._buffer[self._index]
+        self._index += 1
+        return value
+
+    def set_params(self, *params):
+        """Draw with new distribution parameters from the next value on, continuing the same generator"""
+        self._params = params
+        self._buffer = []  # Values pre-drawn with the old parameters are discarded
+        self._index = 0
+
+class VariateService:
+    """Independent random streams per purpose, all derived from one run seed
+
+    Each stream is seeded from (seed, hash of its name), so adding a stream or drawing more
+    from one never changes the values another stream produces. Two runs with the same seed
+    therefore see the same shipment sizes, arrivals, deadlines, etc., whatever else differs.
+    """
+    def __init__(self, seed, block_size=VARIATE_BLOCK_SIZE):
+        self.seed = seed
+        self.block_size = block_size
+        self.streams = {}
+
+    def stream(self, name, distribution, *params):
+        """Register a stream drawing from a numpy.random.Generator method, e.g. ('gamma', shape, scale)
+
+        Streams hold only names, numbers and NumPy generators, so they can be pickled with a
+        checkpoint and continue with exactly the same values.
+        """
+        if name in self.streams:
+            raise ValueError(f"Variate stream {name!r} is already registered")
+        seed_sequence = np.random.SeedSequence([self.seed, zlib.crc32(name.encode())])
+        stream = VariateStream(name, np.random.Generator(np.random.PCG64(seed_sequence)), distribution, params,
+                               self.block_size)
+        self.streams[name] = stream
+        return stream